@@ -0,0 +1,208 @@
+# ============================================================
+#Licensed to the Apache Software Foundation (ASF) under one
+#or more contributor license agreements.  See the NOTICE file
+#distributed with this work for additional information
+#regarding copyright ownership.  The ASF licenses this file
+#to you under the Apache License, Version 2.0 (the
+#"License"); you may not use this file except in compliance
+#with the License.  You may obtain a copy of the License at
+
+#    http://www.apache.org/licenses/LICENSE-2.0
+
+#Unless required by applicable law or agreed to in writing, software
+#distributed under the License is distributed on an "AS IS" BASIS,
+#WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#See the License for the specific language governing permissions and
+#limitations under the License.
+# ============================================================
+# motirobotics/benchmark_ox_crowd.py
+# OX 퀴즈 인원 세기 벤치마크.
+# 얼굴 크롭 이미지를 여러 크기로 붙여 좌우 인원 수를 아는 합성 프레임을 만들고,
+# OX 판정 경로(CrowdDetector → 코 위치 → 좌우 인원 수)에 통과시켜 속도와 오차를 잽니다.
+#
+# 사용 예:
+#   python benchmark_ox_crowd.py --faces ./face_crops
+#   python benchmark_ox_crowd.py --faces ./face_crops --resolutions 1280x720,1920x1080 --tiles 1x1,2x1,3x2 --frames 30
+#   python benchmark_ox_crowd.py --faces ./face_crops --near 3 --full-widths 0,640   # 타일 경계의 가까운 큰 얼굴
+
+import os
+import sys
+import glob
+import json
+import argparse
+import numpy as np
+from function import suppress
+from function import landmarks as L
+from function.crowd import CrowdDetector
+
+def parse_size(text: str) -> tuple[int, int]:
+    w, h = text.lower().split("x")
+    return int(w), int(h)
+
+def load_crops(folder: str) -> list[np.ndarray]:
+    """폴더의 얼굴 크롭 이미지(jpg/png)를 RGB 배열로 읽습니다."""
+    cv2, _ = suppress.import_cv2_mp()
+    crops = []
+    for path in sorted(glob.glob(os.path.join(folder, "*"))):
+        if os.path.splitext(path)[1].lower() not in (".jpg", ".jpeg", ".png", ".bmp"):
+            continue
+        img = cv2.imread(path, cv2.IMREAD_COLOR)
+        if img is not None:
+            crops.append(cv2.cvtColor(img, cv2.COLOR_BGR2RGB))
+    return crops
+
+def make_layouts(n_frames: int, n_crops: int, max_per_side: int, scale: tuple[float, float],
+                 aspect: float, rng: np.random.Generator, near: int = 0,
+                 near_scale: tuple[float, float] = (0.07, 0.14)) -> list[list[tuple]]:
+    """
+    프레임별 얼굴 배치 [(크롭 번호, x0, y0, 폭), ...]를 정규화 좌표로 만듭니다.
+    얼굴 폭은 scale 범위에서 로그 균등하게 뽑고, 얼굴끼리 겹치지 않게 놓습니다.
+    near > 0이면 프레임마다 near명까지 카메라 가까이 선 큰 얼굴(near_scale)을 먼저,
+    세로 중앙(서 있는 사람 얼굴 높이이자 2줄 타일의 경계)에 걸치게 놓습니다.
+    해상도와 무관한 좌표라 같은 장면을 여러 해상도로 그릴 수 있습니다.
+    """
+    def place(faces, rects, side, size_range, y_range) -> None:
+        for _ in range(50):  # 자리가 없으면 그 얼굴은 빼고 정답 수에서도 제외
+            fw = float(np.exp(rng.uniform(np.log(size_range[0]), np.log(size_range[1]))))
+            fh = fw * aspect
+            # 얼굴 전체가 자기 쪽 절반 안에 들어가야 코 위치로 좌우가 확실합니다.
+            x0 = rng.uniform(side * 0.5 + 0.01, (side + 1) * 0.5 - fw - 0.01)
+            y0 = rng.uniform(max(0.02, y_range[0] - fh / 2), min(0.98 - fh, y_range[1] - fh / 2))
+            rect = np.array([x0, y0, x0 + fw, y0 + fh])
+            if all(rect[2] < r[0] or r[2] < rect[0] or rect[3] < r[1] or r[3] < rect[1] for r in rects):
+                rects.append(rect)
+                faces.append((int(rng.integers(0, n_crops)), x0, y0, fw))
+                return
+
+    layouts = []
+    for _ in range(n_frames):
+        faces, rects = [], []
+        for _ in range(int(rng.integers(0, near + 1))):
+            place(faces, rects, int(rng.integers(0, 2)), near_scale, (0.4, 0.6))  # 얼굴 중심이 세로 40~60%
+        for side in (0, 1):
+            for _ in range(int(rng.integers(0, max_per_side + 1))):
+                place(faces, rects, side, scale, (0.0, 1.0))
+        layouts.append(faces)
+    return layouts
+
+def render(layout, crops, size: tuple[int, int], background: np.ndarray) -> tuple[np.ndarray, tuple[int, int]]:
+    """배치를 size 해상도로 그려 (RGB 프레임, (왼쪽, 오른쪽) 정답 인원)을 돌려줍니다."""
+    cv2, _ = suppress.import_cv2_mp()
+    w, h = size
+    frame = cv2.resize(background, (w, h), interpolation=cv2.INTER_AREA)
+    left = right = 0
+    for idx, x0, y0, fw in layout:
+        crop = crops[idx]
+        pw = max(8, int(round(fw * w)))
+        px, py = int(x0 * w), int(y0 * h)
+        face = cv2.resize(crop, (pw, max(8, crop.shape[0] * pw // crop.shape[1])), interpolation=cv2.INTER_AREA)
+        face = face[:h - py]
+        ph = face.shape[0]
+        # 타원형으로 부드럽게 합성해 사각 경계가 얼굴 검출에 영향을 주지 않게 합니다.
+        mask = np.zeros((ph, pw), np.float32)
+        cv2.ellipse(mask, (pw // 2, ph // 2), (pw // 2, ph // 2), 0, 0, 360, 1.0, -1)
+        mask = cv2.GaussianBlur(mask, (0, 0), max(1.0, pw * 0.04))[..., None]
+        roi = frame[py:py + ph, px:px + pw]
+        roi[:] = (face * mask + roi * (1 - mask)).astype(np.uint8)
+        if x0 + fw / 2 < 0.5: left += 1
+        else:                 right += 1
+    return frame, (left, right)
+
+def make_background(path: str | None, rng: np.random.Generator) -> np.ndarray:
+    cv2, _ = suppress.import_cv2_mp()
+    if path:
+        img = cv2.imread(path, cv2.IMREAD_COLOR)
+        if img is None:
+            sys.exit(f"❌ 배경 이미지를 읽을 수 없습니다: {path}")
+        return cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    # 배경이 없으면 흐린 색 잡음 (실내 배경처럼 저주파 위주)
+    noise = rng.integers(40, 200, size=(36, 64, 3), dtype=np.uint8)
+    return cv2.GaussianBlur(cv2.resize(noise, (1920, 1080), interpolation=cv2.INTER_CUBIC), (0, 0), 15)
+
+def run_config(name: str, detector: CrowdDetector, frames: list, warmup: int = 2) -> dict:
+    """합성 프레임을 OX 판정 경로에 통과시켜 지표를 계산합니다."""
+    for rgb, _ in frames[:warmup]:
+        detector.detect(rgb)
+    latencies, errors, exact, truth_faces = [], [], 0, 0
+    for rgb, (true_left, true_right) in frames:
+        _, noses, ms = detector.detect(rgb)
+        left, right = L.side_counts(noses[:, 0])
+        latencies.append(ms)
+        errors.append((left - true_left, right - true_right))
+        exact += (left, right) == (true_left, true_right)
+        truth_faces += true_left + true_right
+    lat = np.array(latencies)
+    err = np.array(errors, dtype=np.float32).reshape(-1, 2)
+    return {
+        "config": name,
+        "frames": len(frames),
+        "faces_per_sec": truth_faces / (lat.sum() / 1000.0) if lat.sum() > 0 else 0.0,
+        "latency_mean_ms": float(lat.mean()),
+        "latency_p95_ms": float(np.percentile(lat, 95)),
+        "mae_per_side": float(np.abs(err).mean()),
+        "bias_per_side": float(err.mean()),  # 음수면 덜 셈(놓침), 양수면 더 셈(중복/오검출)
+        "exact_rate": exact / len(frames),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="OX 퀴즈 인원 세기 합성 벤치마크")
+    parser.add_argument("--faces", required=True, help="얼굴 크롭 이미지 폴더 (한 장에 얼굴 하나)")
+    parser.add_argument("--background", help="배경 이미지 (없으면 흐린 잡음)")
+    parser.add_argument("--frames", type=int, default=20, help="해상도별 합성 프레임 수")
+    parser.add_argument("--max-per-side", type=int, default=12, help="한쪽 최대 인원")
+    parser.add_argument("--scale", default="0.03,0.12", help="얼굴 폭 범위 (프레임 폭 대비)")
+    parser.add_argument("--near", type=int, default=2, help="프레임당 최대 가까운 큰 얼굴 수 (타일 경계 높이에 배치)")
+    parser.add_argument("--near-scale", default="0.07,0.14", help="가까운 얼굴 폭 범위 (1280 폭에서 약 90~180px)")
+    parser.add_argument("--resolutions", default="1280x720,1920x1080")
+    parser.add_argument("--tiles", default="1x1,3x2", help="tiled 모드 타일 구성 목록 (1x1 = 확대 없는 전체 프레임)")
+    parser.add_argument("--overlap", type=float, default=0.2)
+    parser.add_argument("--full-widths", default="0,640", help="tiled 모드에 함께 돌릴 축소 전체 프레임 폭 목록 (0 = 끔)")
+    parser.add_argument("--no-upscale", action="store_true", help="예전 1.5배 확대 방식 비교 생략")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="결과를 JSON으로 저장할 경로")
+    args = parser.parse_args()
+
+    crops = load_crops(args.faces)
+    if not crops:
+        sys.exit(f"❌ 얼굴 크롭 이미지가 없습니다: {args.faces}")
+    rng = np.random.default_rng(args.seed)
+    scale = tuple(float(v) for v in args.scale.split(","))
+    aspect = float(np.median([c.shape[0] / c.shape[1] for c in crops]))
+    near_scale = tuple(float(v) for v in args.near_scale.split(","))
+    layouts = make_layouts(args.frames, len(crops), args.max_per_side, scale, aspect, rng, args.near, near_scale)
+    background = make_background(args.background, rng)
+    print(f"✅ 크롭 {len(crops)}장, 장면 {len(layouts)}개, 얼굴 폭 {scale[0]:.0%}~{scale[1]:.0%}"
+          + (f", 가까운 얼굴 최대 {args.near}명 ({near_scale[0]:.0%}~{near_scale[1]:.0%})" if args.near else ""))
+
+    full_widths = [int(v) for v in args.full_widths.split(",")]
+    modes = [("tiled", parse_size(t), fw) for t in args.tiles.split(",") for fw in full_widths]
+    if not args.no_upscale:
+        modes.append(("upscale", (1, 1), 0))
+
+    results = []
+    for res_text in args.resolutions.split(","):
+        size = parse_size(res_text)
+        frames = [render(layout, crops, size, background) for layout in layouts]
+        for mode, (cols, rows), full_width in modes:
+            name = f"{res_text} {mode}" + (f" {cols}x{rows}" if mode == "tiled" else "") + (f"+{full_width}" if full_width else "")
+            detector = CrowdDetector(mode=mode, cols=cols, rows=rows, overlap=args.overlap, full_width=full_width)
+            try:
+                results.append(run_config(name, detector, frames))
+            finally:
+                detector.close()
+
+    print("--------------------------------------------------------------------------------")
+    print(f"{'구성':<30}{'얼굴/초':>9}{'평균ms':>9}{'p95ms':>9}{'MAE':>7}{'편향':>7}{'정확':>7}")
+    for r in results:
+        print(f"{r['config']:<30}{r['faces_per_sec']:>9.1f}{r['latency_mean_ms']:>9.1f}{r['latency_p95_ms']:>9.1f}"
+              f"{r['mae_per_side']:>7.2f}{r['bias_per_side']:>+7.2f}{r['exact_rate']:>7.0%}")
+    print("--------------------------------------------------------------------------------")
+    print("MAE/편향: 한쪽 인원 수 오차 (명), 정확: 좌우 인원이 모두 맞은 프레임 비율")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"💾 결과 저장: {args.json}")
+
+if __name__ == "__main__":
+    main()
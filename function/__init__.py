@@ -17,5 +17,13 @@
 # ============================================================
 
 # mk2/__init__.py
-from . import config, dxl_io, init, dance, face, wheel
+# 하위 모듈은 처음 쓸 때 불러옵니다.
+# (dxl_io 등은 dynamixel_sdk가 필요하므로, crowd/landmarks만 쓰는 벤치마크·테스트가 하드웨어 모듈 없이 돌 수 있게)
+import importlib
+
 __all__ = ["config", "dxl_io", "init", "dance", "face", "wheel"]
+
+def __getattr__(name):
+    if name in __all__:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
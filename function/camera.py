@@ -0,0 +1,227 @@
+# ============================================================
+#Licensed to the Apache Software Foundation (ASF) under one
+#or more contributor license agreements.  See the NOTICE file
+#distributed with this work for additional information
+#regarding copyright ownership.  The ASF licenses this file
+#to you under the Apache License, Version 2.0 (the
+#"License"); you may not use this file except in compliance
+#with the License.  You may obtain a copy of the License at
+
+#    http://www.apache.org/licenses/LICENSE-2.0
+
+#Unless required by applicable law or agreed to in writing, software
+#distributed under the License is distributed on an "AS IS" BASIS,
+#WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#See the License for the specific language governing permissions and
+#limitations under the License.
+# ============================================================
+# function/camera.py
+# 영상 소스 계층: 실시간 카메라(OS별 백엔드, 저지연 설정)와
+# 녹화 파일/이미지 시퀀스 재생(결정적인 재생 위치)을 같은 인터페이스로 제공합니다.
+# 어느 소스든 read()의 촬영 시각은 time.perf_counter 기준이라 소비자의 시간 초과 검사와 그대로 비교됩니다.
+
+from __future__ import annotations
+import os
+import glob
+import time
+import platform
+from . import config as C, suppress
+
+_IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".bmp")
+
+def _default_backend(cv2) -> int:
+    system = platform.system()
+    if system == "Windows":
+        return cv2.CAP_DSHOW
+    if system == "Darwin":
+        return cv2.CAP_AVFOUNDATION
+    return cv2.CAP_V4L2
+
+class VideoSource:
+    """
+    프레임 소스 공통 인터페이스.
+    read()는 (ok, frame(BGR), 촬영 시각[time.perf_counter 초])를 돌려줍니다.
+    """
+    name = "source"
+
+    def open(self) -> bool:
+        raise NotImplementedError
+
+    def read(self):
+        raise NotImplementedError
+
+    def release(self):
+        pass
+
+    def __enter__(self):
+        if not self.open():
+            raise RuntimeError(f"영상 소스를 열 수 없습니다: {self.name}")
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+class CameraSource(VideoSource):
+    """실시간 카메라. MJPG, 버퍼 1장, FPS 지정으로 지연을 줄입니다."""
+    def __init__(self, index: int, width: int = C.CAM_WIDTH, height: int = C.CAM_HEIGHT,
+                 fps: float = C.CAM_FPS, fourcc: str = C.CAM_FOURCC, buffer_size: int = 1,
+                 backend: int | None = None):
+        self.index = index
+        self.width, self.height, self.fps = width, height, fps
+        self.fourcc, self.buffer_size, self.backend = fourcc, buffer_size, backend
+        self.name = f"camera({index})"
+        self._cap = None
+
+    def open(self) -> bool:
+        cv2, _ = suppress.import_cv2_mp()
+        backend = _default_backend(cv2) if self.backend is None else self.backend
+        cap = cv2.VideoCapture(self.index, backend)
+        if not cap.isOpened():
+            # 지정 백엔드가 없는 빌드도 있어 자동 선택으로 한 번 더 시도합니다.
+            cap.release()
+            cap = cv2.VideoCapture(self.index)
+        if not cap.isOpened():
+            return False
+
+        # FOURCC는 해상도보다 먼저 설정해야 적용되는 드라이버가 많습니다.
+        if self.fourcc:
+            cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*self.fourcc))
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        if self.fps:
+            cap.set(cv2.CAP_PROP_FPS, self.fps)
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, self.buffer_size)
+        self._cap = cap
+        print(f"▶ {self.name}: {int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))}x{int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))}"
+              f" @ {cap.get(cv2.CAP_PROP_FPS):.0f}fps")
+        return True
+
+    def read(self):
+        ok, frame = self._cap.read()
+        return ok, frame, time.perf_counter()
+
+    def release(self):
+        if self._cap is not None:
+            try: self._cap.release()
+            except Exception: pass
+            self._cap = None
+
+class FileSource(VideoSource):
+    """
+    녹화 파일(동영상) 또는 이미지 시퀀스(디렉터리, 글롭 패턴) 재생.
+    position(초)은 index / fps로, 0에서 시작해 몇 번을 돌려도 같은 프레임에 같은 값이 붙습니다.
+    read()의 timestamp는 열린 시각 + position이며 time.perf_counter와 같은 시계입니다.
+    realtime=True에서 읽는 쪽이 느리면 밀린 프레임을 건너뛰어 timestamp가 현재 시각을 따라가게 합니다.
+    realtime=False면 기다리지 않고 최대 속도로 읽되, timestamp는 현재 시각을 넘지 않게 자릅니다.
+    (미래 시각이 붙으면 perf_counter와 비교하는 시간 초과 검사가 깨집니다.)
+    """
+    def __init__(self, path: str, fps: float | None = None, realtime: bool = True, loop: bool = False):
+        self.path = path
+        self.fps = fps
+        self.realtime, self.loop = realtime, loop
+        self.name = f"file({path})"
+        self._cv2 = None
+        self._cap = None
+        self._files: list[str] | None = None
+        self._pos = 0      # 다음에 읽을 파일/프레임 위치
+        self._index = 0    # 지금까지 내보낸 프레임 수 (timestamp 기준)
+        self._t0 = 0.0
+        self.position = 0.0  # 마지막으로 내보낸 프레임의 재생 위치 (index / fps 초, 결정적)
+
+    def open(self) -> bool:
+        cv2, _ = suppress.import_cv2_mp()
+        self._cv2 = cv2
+        if os.path.isdir(self.path):
+            files = [os.path.join(self.path, f) for f in os.listdir(self.path)]
+        elif any(ch in self.path for ch in "*?["):
+            files = glob.glob(self.path)
+        else:
+            files = None
+
+        if files is not None:
+            self._files = sorted(f for f in files if f.lower().endswith(_IMAGE_EXTS))
+            if not self._files:
+                return False
+            self.fps = self.fps or C.CAM_FPS
+        else:
+            cap = cv2.VideoCapture(self.path)
+            if not cap.isOpened():
+                return False
+            self._cap = cap
+            self.fps = self.fps or cap.get(cv2.CAP_PROP_FPS) or C.CAM_FPS
+
+        self._pos = self._index = 0
+        self.position = 0.0
+        self._t0 = time.perf_counter()
+        return True
+
+    def _next_frame(self):
+        if self._files is not None:
+            if self._pos >= len(self._files):
+                return False, None
+            frame = self._cv2.imread(self._files[self._pos])
+            self._pos += 1
+            return frame is not None, frame
+        return self._cap.read()
+
+    def _skip_frame(self) -> bool:
+        """디코딩하지 않고 한 프레임 건너뜁니다."""
+        if self._files is not None:
+            if self._pos >= len(self._files):
+                return False
+            self._pos += 1
+            return True
+        return self._cap.grab()
+
+    def _rewind(self):
+        self._pos = 0
+        if self._cap is not None:
+            self._cap.set(self._cv2.CAP_PROP_POS_FRAMES, 0)
+
+    def read(self):
+        if self.realtime:
+            # 읽는 쪽이 fps보다 느리면 지금 시각에 해당하는 프레임까지 건너뜁니다.
+            # (버퍼 1장짜리 카메라처럼 늘 최신 프레임을 주므로 timestamp가 실제 시각보다 밀리지 않습니다.)
+            due = int((time.perf_counter() - self._t0) * self.fps)
+            while self._index < due:
+                if not self._skip_frame():
+                    if not self.loop:
+                        break
+                    self._rewind()
+                    if not self._skip_frame():
+                        break
+                self._index += 1
+
+        ok, frame = self._next_frame()
+        if not ok and self.loop:
+            # 반복 재생: 파일 위치만 처음으로 돌리고 timestamp는 계속 증가시킵니다.
+            self._rewind()
+            ok, frame = self._next_frame()
+        if not ok:
+            return False, None, time.perf_counter()
+
+        self.position = self._index / self.fps
+        self._index += 1
+        t = self._t0 + self.position
+        now = time.perf_counter()
+        if self.realtime:
+            if t > now:
+                time.sleep(t - now)
+        else:
+            t = min(t, now)
+        return True, frame, t
+
+    def release(self):
+        if self._cap is not None:
+            try: self._cap.release()
+            except Exception: pass
+            self._cap = None
+
+def open_source(spec: str | int, **kwargs) -> VideoSource:
+    """
+    spec이 숫자면 카메라 인덱스, 아니면 파일/디렉터리/글롭 경로로 보고 소스를 만듭니다.
+    (열기는 호출하는 쪽에서 open() 또는 with 문으로 합니다.)
+    """
+    if isinstance(spec, int) or str(spec).strip().lstrip("-").isdigit():
+        return CameraSource(int(spec), **kwargs)
+    return FileSource(str(spec), realtime=C.VIDEO_REALTIME, loop=C.VIDEO_LOOP, **kwargs)
@@ -20,6 +20,17 @@
 
 import os
 import platform
+
+# .env.local 값을 모듈 상수보다 먼저 읽어야 PREVIEW, DXL_PORT 등이 반영됩니다.
+try:
+    from dotenv import load_dotenv
+    if os.path.exists(".env.local"):
+        load_dotenv(dotenv_path=".env.local")
+    else:
+        load_dotenv()
+except Exception:
+    pass
+
 try:
     import serial.tools.list_ports
 except ImportError:
@@ -81,14 +92,91 @@ SERVO_MIN, SERVO_MAX = 0, 4095
 TILT_POS_MAX = 2040 # 👈 9번 모터의 최대 위치 제한값을 여기에 추가합니다.
 PAN_SIGN = 1      # 👈 이 줄을 추가해주세요. (팬 모터 방향)
 TILT_SIGN = -1    # 👈 이 줄을 추가해주세요. (틸트 모터 방향)
-KP_PAN, KP_TILT = 0.3, 0.3       # ✅ P 게인 (엔진)
+# PID 게인은 '초' 단위입니다. (예전 프레임당 0.3 × 기준 30fps = 9.0)
+# 카메라/추론 FPS가 바뀌어도 고개 반응 속도가 같도록 실제 경과 시간(dt)을 곱해 씁니다.
+KP_PAN, KP_TILT = 9.0, 9.0       # ✅ P 게인 (엔진)
 KI_PAN, KI_TILT = 0.0, 0.0     # ✅ I 게인 (미세조정) - 이 부분이 누락되었을 수 있습니다.
 KD_PAN, KD_TILT = 0.0, 0.0       # ✅ D 게인 (브레이크)
+INTEGRAL_LIMIT = 7.0             # I 누적 상한 (픽셀·초, 예전 ±200 프레임 누적과 동일 수준)
 DEAD_ZONE = 50
 MAX_PIXEL_OFF = 200
 PROFILE_VELOCITY = 100
 MIN_MOVE_DELTA = 5
 
+# ---- 고개 제어 루프 ----
+HEAD_CONTROL_HZ = float(os.getenv("HEAD_CONTROL_HZ", "100"))        # 팬/틸트 제어 주기
+HEAD_TARGET_TIMEOUT = float(os.getenv("HEAD_TARGET_TIMEOUT", "0.25")) # 이보다 오래된 목표는 무시 (초)
+
+# ---- 얼굴 인식 ----
+# 1이면 FaceLandmarker를 LIVE_STREAM(detect_async) 모드로 실행합니다.
+FACE_LIVE_STREAM = os.getenv("FACE_LIVE_STREAM", "0") not in ("0", "false", "False")
+
+# ---- OX 퀴즈 군중 검출 (function/crowd.py) ----
+# tiled  : 원본 해상도 타일 검출 (기본) / upscale: 예전 방식(1.5배 확대, 비교용) / frame: 트래커 결과 그대로
+OX_DETECT_MODE = os.getenv("OX_DETECT_MODE", "tiled").strip().lower()
+if OX_DETECT_MODE not in ("tiled", "upscale", "frame"):
+    print(f"⚠️ 알 수 없는 OX_DETECT_MODE 값 '{OX_DETECT_MODE}' → tiled 사용")
+    OX_DETECT_MODE = "tiled"
+_ox_tiles = os.getenv("OX_TILES", "3x2").lower().split("x")
+OX_TILE_COLS, OX_TILE_ROWS = int(_ox_tiles[0]), int(_ox_tiles[1])
+OX_TILE_OVERLAP = float(os.getenv("OX_TILE_OVERLAP", "0.2"))
+OX_TILE_FACES = int(os.getenv("OX_TILE_FACES", "20"))           # 타일당 최대 얼굴 수 (3x2면 최대 120명)
+# tiled 모드에서 타일과 함께 이 폭으로 줄인 전체 프레임도 검출합니다. (타일 경계에 잘리는 가까운 큰 얼굴용, 0이면 끔)
+OX_FULL_WIDTH = int(os.getenv("OX_FULL_WIDTH", "640"))
+OX_MIN_CONFIDENCE = float(os.getenv("OX_MIN_CONFIDENCE", "0.3"))
+# 라운드 판정: 최근 OX_COUNT_WINDOW초 인원 수의 중앙값을 쓰고,
+# OX_MIN_ROUND초가 지난 뒤 그 값이 OX_STABLE_SECONDS초 동안 그대로면 10초를 다 채우지 않고 끝냅니다.
+OX_COUNT_WINDOW   = float(os.getenv("OX_COUNT_WINDOW", "2.0"))
+OX_MIN_ROUND      = float(os.getenv("OX_MIN_ROUND", "5.0"))
+OX_STABLE_SECONDS = float(os.getenv("OX_STABLE_SECONDS", "2.5"))
+# 참가자 ID 추적: 박스가 OX_ID_MIN_IOU 이상 겹치거나 중심이 얼굴 폭 안이면 같은 사람,
+# OX_ID_MAX_MISSED 프레임 동안 안 보이면 ID를 버립니다. 라운드에서 OX_ID_MIN_FRAMES 번 이상 보인 ID만 셉니다.
+OX_ID_MIN_IOU    = float(os.getenv("OX_ID_MIN_IOU", "0.3"))
+OX_ID_MAX_MISSED = int(os.getenv("OX_ID_MAX_MISSED", "15"))
+OX_ID_MIN_FRAMES = int(os.getenv("OX_ID_MIN_FRAMES", "3"))
+
+# ---- 영상 소스 ----
+# VIDEO_SOURCE가 숫자면 카메라 인덱스, 경로면 녹화 파일/이미지 시퀀스를 재생합니다. (launcher.py 참고)
+CAM_WIDTH  = int(os.getenv("CAM_WIDTH", "1280"))
+CAM_HEIGHT = int(os.getenv("CAM_HEIGHT", "720"))
+CAM_FPS    = float(os.getenv("CAM_FPS", "30"))
+CAM_FOURCC = os.getenv("CAM_FOURCC", "MJPG")   # 빈 값이면 드라이버 기본값
+VIDEO_REALTIME = os.getenv("VIDEO_REALTIME", "1") not in ("0", "false", "False")  # 파일 재생을 실제 속도로
+VIDEO_LOOP     = os.getenv("VIDEO_LOOP", "0") not in ("0", "false", "False")
+
+# ---- 카메라 미리보기 ----
+# off | throttled | full  (throttled: 축소 + FPS 제한으로 노트북 CPU 사용을 몇 % 이내로)
+PREVIEW_MODE = os.getenv("PREVIEW", "throttled").strip().lower()
+if PREVIEW_MODE not in ("off", "throttled", "full"):
+    print(f"⚠️ 알 수 없는 PREVIEW 값 '{PREVIEW_MODE}' → throttled 사용")
+    PREVIEW_MODE = "throttled"
+PREVIEW_FPS = float(os.getenv("PREVIEW_FPS", "15"))
+PREVIEW_SCALE = float(os.getenv("PREVIEW_SCALE", "0.5"))
+
+# ---- 가위바위보 인식 ----
+RPS_MAX_PLAYERS = int(os.getenv("RPS_MAX_PLAYERS", "1"))   # 2 이상이면 여러 명이 한 판에 (왼쪽부터 1번)
+# 1이면 손을 처음 찾은 뒤 그 주변만 잘라서 인식합니다. (손을 놓치면 다시 전체 화면)
+RPS_HAND_ROI = os.getenv("RPS_HAND_ROI", "0") not in ("0", "false", "False")
+RPS_ROI_MARGIN = float(os.getenv("RPS_ROI_MARGIN", "1.0"))   # 손 박스 크기 대비 사방 여유 비율
+RPS_ROI_MIN_SIZE = float(os.getenv("RPS_ROI_MIN_SIZE", "0.35"))   # 자른 영역의 최소 크기 (화면 대비)
+RPS_ROI_LOST_FRAMES = int(os.getenv("RPS_ROI_LOST_FRAMES", "10"))  # 이만큼 연속으로 놓치면 전체 화면으로 복귀
+# 시간 창 투표: 창(초) 안에서 한 제스처의 점수 합이 RPS_VOTE_MASS 이상이고
+# 2등보다 RPS_VOTE_MARGIN 이상 앞서면 바로 결정합니다. (3초가 지나면 그때까지의 1등)
+RPS_VOTE_WINDOW = float(os.getenv("RPS_VOTE_WINDOW", "1.0"))
+RPS_VOTE_MASS   = float(os.getenv("RPS_VOTE_MASS", "3.0"))
+RPS_VOTE_MARGIN = float(os.getenv("RPS_VOTE_MARGIN", "1.5"))
+# "보!" 발화가 끝난 시각(SHOOT)을 기준으로 [SHOOT - LEAD, SHOOT + WINDOW] 안에 찍힌 프레임만 인식합니다.
+RPS_SHOOT_WAIT   = float(os.getenv("RPS_SHOOT_WAIT", "10.0"))   # SHOOT 신호를 기다리는 최대 시간 (초)
+RPS_SHOOT_LEAD   = float(os.getenv("RPS_SHOOT_LEAD", "0.15"))
+RPS_SHOOT_WINDOW = float(os.getenv("RPS_SHOOT_WINDOW", "2.0"))
+
+# ---- 비전 워커 프로세스 분리 ----
+# 1이면 가위바위보 워커를 별도 프로세스로 띄우고 공유 메모리 프레임 링(function/shm_ring.py)으로 프레임을 넘깁니다.
+VISION_PROCESSES = os.getenv("VISION_PROCESSES", "0") not in ("0", "false", "False")
+FRAME_RING_SLOTS = int(os.getenv("FRAME_RING_SLOTS", "4"))
+# 카메라가 요청보다 큰 해상도를 줄 수도 있어 최소 1080p 크기로 슬롯을 잡습니다.
+FRAME_RING_SLOT_BYTES = max(CAM_WIDTH * CAM_HEIGHT, 1920 * 1080) * 3
+
 # ---- 휠(Velocity) ----
 LEFT_ID, RIGHT_ID = 4, 3
 LEFT_DIR, RIGHT_DIR = -1, +1
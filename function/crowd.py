@@ -0,0 +1,184 @@
+# ============================================================
+#Licensed to the Apache Software Foundation (ASF) under one
+#or more contributor license agreements.  See the NOTICE file
+#distributed with this work for additional information
+#regarding copyright ownership.  The ASF licenses this file
+#to you under the Apache License, Version 2.0 (the
+#"License"); you may not use this file except in compliance
+#with the License.  You may obtain a copy of the License at
+
+#    http://www.apache.org/licenses/LICENSE-2.0
+
+#Unless required by applicable law or agreed to in writing, software
+#distributed under the License is distributed on an "AS IS" BASIS,
+#WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#See the License for the specific language governing permissions and
+#limitations under the License.
+# ============================================================
+# function/crowd.py
+# OX 퀴즈용 군중 얼굴 검출.
+# - tiled  : 원본 해상도를 겹치는 타일로 나눠 스레드 풀에서 동시에 검출하고, 타일 경계의 중복을 코 위치로 제거
+#            (타일 경계에 걸친 가까운 큰 얼굴은 축소한 전체 프레임 검출로 함께 잡습니다)
+# - upscale: 예전 OX 방식 (전체 프레임 1.5배 확대 후 한 번에 검출) — 비교용
+# 결과는 모두 전체 프레임 기준 정규화 좌표입니다.
+
+from __future__ import annotations
+import os
+import time
+import queue
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from . import config as C, suppress
+from . import landmarks as L
+from mediapipe.tasks import python
+from mediapipe.tasks.python import vision
+
+_MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'models', 'face_landmarker.task')
+
+def tile_grid(w: int, h: int, cols: int, rows: int, overlap: float) -> list[tuple[int, int, int, int]]:
+    """겹침 비율 overlap으로 프레임을 cols x rows 타일로 나눈 픽셀 영역 (x0, y0, x1, y1) 목록."""
+    tw = w / (cols - (cols - 1) * overlap)
+    th = h / (rows - (rows - 1) * overlap)
+    tiles = []
+    for r in range(rows):
+        for c in range(cols):
+            x0, y0 = int(round(c * tw * (1 - overlap))), int(round(r * th * (1 - overlap)))
+            tiles.append((x0, y0, min(w, int(round(x0 + tw))), min(h, int(round(y0 + th)))))
+    return tiles
+
+def suppress_duplicates(boxes: np.ndarray, noses: np.ndarray, w: int, h: int,
+                        radius: float = 0.5, contain: float = 0.6) -> np.ndarray:
+    """
+    여러 타일(과 전체 프레임 검출)에서 같은 얼굴이 잡힌 경우를 지웁니다. 남길 인덱스를 돌려줍니다.
+    - 두 코 사이 거리(픽셀)가 작은 쪽 얼굴 폭 × radius보다 가깝거나
+    - 작은 박스의 contain 비율 이상이 큰 박스 안에 들어 있으면 (경계에 잘린 얼굴 조각)
+    같은 사람으로 보고 박스가 더 큰 쪽(덜 잘린 쪽)을 남깁니다.
+    """
+    n = len(noses)
+    if n <= 1:
+        return np.arange(n)
+    scale = np.array([w, h], dtype=np.float32)
+    pts = noses * scale
+    widths = (boxes[:, 2] - boxes[:, 0]) * w
+    areas = widths * (boxes[:, 3] - boxes[:, 1]) * h
+    order = np.argsort(-areas)
+
+    dist = np.linalg.norm(pts[:, None, :] - pts[None, :, :], axis=2)
+    limit = np.minimum(widths[:, None], widths[None, :]) * radius
+    ix = np.clip(np.minimum(boxes[:, None, 2], boxes[None, :, 2]) - np.maximum(boxes[:, None, 0], boxes[None, :, 0]), 0, None)
+    iy = np.clip(np.minimum(boxes[:, None, 3], boxes[None, :, 3]) - np.maximum(boxes[:, None, 1], boxes[None, :, 1]), 0, None)
+    inter = ix * iy * (w * h)
+    smaller = np.maximum(np.minimum(areas[:, None], areas[None, :]), 1e-6)
+    dup = (dist < limit) | (inter / smaller >= contain)
+
+    keep = np.ones(n, dtype=bool)
+    for i in order:
+        if keep[i]:
+            others = dup[i].copy()
+            others[i] = False
+            keep[others & (areas <= areas[i])] = False
+    return np.flatnonzero(keep)
+
+class CrowdDetector:
+    """
+    detect(rgb)는 (boxes (N,4), noses (N,2), 추론 시간 ms)를 돌려줍니다.
+    FaceLandmarker 인스턴스는 동시에 호출할 수 없으므로 작업자 수만큼 만들어 풀에서 빌려 씁니다.
+    """
+    def __init__(self, mode: str = C.OX_DETECT_MODE, cols: int = C.OX_TILE_COLS, rows: int = C.OX_TILE_ROWS,
+                 overlap: float = C.OX_TILE_OVERLAP, workers: int | None = None,
+                 faces_per_tile: int = C.OX_TILE_FACES, min_confidence: float = C.OX_MIN_CONFIDENCE,
+                 full_width: int = C.OX_FULL_WIDTH):
+        _, self.mp = suppress.import_cv2_mp()
+        self.mode = mode
+        self.cols, self.rows, self.overlap = cols, rows, overlap
+        # 타일 모드에서 같이 돌리는 축소 전체 프레임 검출의 폭 (0이면 끔)
+        self.full_width = full_width if mode == "tiled" else 0
+        n_tiles = cols * rows + (1 if self.full_width else 0) if mode == "tiled" else 1
+        self.workers = workers or min(n_tiles, os.cpu_count() or 1)
+        num_faces = faces_per_tile if mode == "tiled" else max(faces_per_tile, 20)
+
+        self._pool: queue.Queue = queue.Queue()
+        for _ in range(self.workers):
+            options = vision.FaceLandmarkerOptions(
+                base_options=python.BaseOptions(model_asset_path=_MODEL_PATH),
+                running_mode=vision.RunningMode.IMAGE,
+                num_faces=num_faces,
+                min_face_detection_confidence=min_confidence,
+                min_face_presence_confidence=min_confidence,
+                min_tracking_confidence=min_confidence,
+            )
+            self._pool.put(vision.FaceLandmarker.create_from_options(options))
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="crowd") if self.workers > 1 else None
+        self._tiles_for: tuple | None = None
+        self._tiles: list[tuple[int, int, int, int]] = []
+        print(f"✅ OX 군중 검출기 준비 ({mode}"
+              + (f", 타일 {cols}x{rows}, 겹침 {overlap:.0%}, 작업자 {self.workers}" if mode == "tiled" else "")
+              + (f", 전체 프레임 {self.full_width}px" if self.full_width else "") + ")")
+
+    def _detect_region(self, rgb: np.ndarray, region) -> np.ndarray:
+        """영역 하나를 검출해 랜드마크(L.to_array 형식)를 전체 프레임 정규화 좌표로 돌려줍니다."""
+        h, w = rgb.shape[:2]
+        x0, y0, x1, y1 = region
+        crop = np.ascontiguousarray(rgb[y0:y1, x0:x1])
+        landmarker = self._pool.get()
+        try:
+            res = landmarker.detect(self.mp.Image(image_format=self.mp.ImageFormat.SRGB, data=crop))
+        finally:
+            self._pool.put(landmarker)
+        faces = L.to_array(res.face_landmarks)
+        if len(faces):
+            faces[..., 0] = (faces[..., 0] * (x1 - x0) + x0) / w
+            faces[..., 1] = (faces[..., 1] * (y1 - y0) + y0) / h
+        return faces
+
+    def _detect_scaled(self, rgb: np.ndarray, scale: float) -> np.ndarray:
+        """전체 프레임을 scale배로 바꿔 한 번에 검출합니다."""
+        cv2, _ = suppress.import_cv2_mp()
+        h, w = rgb.shape[:2]
+        interp = cv2.INTER_LINEAR if scale > 1 else cv2.INTER_AREA
+        resized = cv2.resize(rgb, (int(w * scale), int(h * scale)), interpolation=interp)
+        landmarker = self._pool.get()
+        try:
+            res = landmarker.detect(self.mp.Image(image_format=self.mp.ImageFormat.SRGB, data=resized))
+        finally:
+            self._pool.put(landmarker)
+        return L.to_array(res.face_landmarks)  # 정규화 좌표라 배율은 되돌릴 필요가 없습니다.
+
+    def _detect_job(self, rgb: np.ndarray, job) -> np.ndarray:
+        if job is None:
+            # 축소한 전체 프레임: 타일 경계에 걸려 양쪽 타일에서 잘리는 가까운 큰 얼굴용
+            return self._detect_scaled(rgb, min(1.0, self.full_width / rgb.shape[1]))
+        return self._detect_region(rgb, job)
+
+    def detect(self, rgb: np.ndarray):
+        t0 = time.perf_counter()
+        h, w = rgb.shape[:2]
+        if self.mode == "upscale":
+            faces = self._detect_scaled(rgb, 1.5)
+            boxes, noses = L.boxes(faces), L.nose_points(faces)
+        else:
+            if self._tiles_for != (w, h):
+                self._tiles_for = (w, h)
+                self._tiles = tile_grid(w, h, self.cols, self.rows, self.overlap)
+            jobs = self._tiles + ([None] if self.full_width else [])
+            if self._executor is not None:
+                parts = list(self._executor.map(lambda job: self._detect_job(rgb, job), jobs))
+            else:
+                parts = [self._detect_job(rgb, job) for job in jobs]
+            parts = [p for p in parts if len(p)]
+            if parts:
+                faces = np.concatenate(parts, axis=0)
+                boxes, noses = L.boxes(faces), L.nose_points(faces)
+                keep = suppress_duplicates(boxes, noses, w, h)
+                boxes, noses = boxes[keep], noses[keep]
+            else:
+                boxes = np.empty((0, 4), dtype=np.float32)
+                noses = np.empty((0, 2), dtype=np.float32)
+        return boxes, noses, (time.perf_counter() - t0) * 1000.0
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+        while not self._pool.empty():
+            try: self._pool.get_nowait().close()
+            except Exception: pass
@@ -21,9 +21,16 @@ from __future__ import annotations
 import os
 import threading
 import platform
-import queue
 import time
+from dataclasses import dataclass
+import numpy as np
 from . import config as C, dxl_io as io, suppress
+from . import landmarks as L
+from .camera import open_source
+from .preprocess import FramePreprocessor, RgbConverter
+from .crowd import CrowdDetector
+from .face_ids import FaceIdTracker
+from .frame_bus import FrameBus, LatestBus
 from dynamixel_sdk import PortHandler, PacketHandler
 from mediapipe.framework.formats import landmark_pb2
 from mediapipe.tasks import python
@@ -34,16 +41,66 @@ _IS_DARWIN = (platform.system() == "Darwin")
 PAN_SIGN  = int(os.getenv("PAN_SIGN",  "1"))
 TILT_SIGN = int(os.getenv("TILT_SIGN", "-1"))
 
-_DISPLAY_Q: "queue.Queue" = queue.Queue(maxsize=1)
-
-def _publish_frame(frame):
-    try:
-        if _DISPLAY_Q.full():
-            try: _DISPLAY_Q.get_nowait()
-            except Exception: pass
-        _DISPLAY_Q.put_nowait(frame)
-    except Exception:
-        pass
+@dataclass
+class TrackResult:
+    """트래커가 프레임마다 내보내는 요약 결과. 좌표는 모두 0~1 정규화 값입니다."""
+    mode: str
+    timestamp: float                       # 촬영 시각 (time.perf_counter 초)
+    boxes: np.ndarray                      # (N, 4) [x_min, y_min, x_max, y_max]
+    noses: np.ndarray                      # (N, 2) 코 위치
+    left_count: int = 0
+    right_count: int = 0
+    target: tuple[float, float] | None = None  # 추적 중인 코 위치
+    sleepy: bool = False
+    show_boxes: bool = True
+    infer_ms: float = 0.0                  # OX 군중 검출에 걸린 시간 (트래커 추론은 포함하지 않음)
+    ids: np.ndarray | None = None          # (N,) OX 퀴즈 중 boxes 순서대로 붙인 참가자 ID
+
+_LATEST_RESULT: TrackResult | None = None
+
+def _publish_result(result: TrackResult):
+    """미리보기용 최신 결과 레코드. 오버레이는 표시 스레드에서 그립니다."""
+    global _LATEST_RESULT
+    _LATEST_RESULT = result
+
+def _draw_overlay(cv2, img, result: TrackResult | None):
+    """결과 레코드를 img 위에 그립니다. img 크기에 맞춰 좌표와 글자 크기를 조정합니다."""
+    if result is None:
+        return
+    h, w = img.shape[:2]
+    cx, cy = w // 2, h // 2
+    s = w / 1280.0  # 기준 해상도(1280x720) 대비 배율
+    def px(v): return max(1, int(round(v * s)))
+
+    if result.mode == 'tracking':
+        if result.sleepy:
+            cv2.putText(img, "Mode: Tracking (Sleepy)", (px(10), px(30)), cv2.FONT_HERSHEY_SIMPLEX, 1.0 * s, (128, 128, 128), px(2))
+        elif result.target is not None:
+            nx, ny = int(result.target[0] * w), int(result.target[1] * h)
+            cv2.circle(img, (cx, cy), px(5), (255, 0, 0), -1)
+            cv2.circle(img, (nx, ny), px(5), (0, 0, 255), -1)
+            cv2.putText(img, "Mode: Tracking", (px(10), px(30)), cv2.FONT_HERSHEY_SIMPLEX, 1.0 * s, (0, 255, 0), px(2))
+
+    elif result.mode == 'ox_quiz':
+        # 1. 화면 중앙에 흰색 세로선 그리기
+        cv2.line(img, (cx, 0), (cx, h), (255, 255, 255), px(3))
+
+        # 2. 왼쪽 상단에 'X' 표시 (빨간색)
+        cv2.putText(img, "X", (px(40), px(80)), cv2.FONT_HERSHEY_TRIPLEX, 3 * s, (0, 0, 255), px(7))
+        cv2.putText(img, f": {result.left_count}", (px(160), px(80)), cv2.FONT_HERSHEY_SIMPLEX, 3 * s, (0, 0, 255), px(7))
+
+        # 3. 오른쪽 상단에 'O' 표시 (초록색)
+        cv2.putText(img, "O", (w - px(250), px(80)), cv2.FONT_HERSHEY_TRIPLEX, 3 * s, (0, 255, 0), px(7))
+        cv2.putText(img, f": {result.right_count}", (w - px(130), px(80)), cv2.FONT_HERSHEY_SIMPLEX, 3 * s, (0, 255, 0), px(7))
+
+        # 4. 화면 하단에 총 인원 수 표시
+        count_text = f"Total: {result.left_count + result.right_count}"
+        text_size = cv2.getTextSize(count_text, cv2.FONT_HERSHEY_SIMPLEX, 1.2 * s, px(3))[0]
+        cv2.putText(img, count_text, (w - text_size[0] - px(20), h - px(30)), cv2.FONT_HERSHEY_SIMPLEX, 1.2 * s, (255, 255, 255), px(3))
+
+    if result.show_boxes and len(result.boxes):
+        for x0, y0, x1, y1 in L.to_pixels(result.boxes, w, h).tolist():
+            cv2.rectangle(img, (x0, y0), (x1, y1), (0, 255, 0), px(2))
 
 def _as_int(v, default=None):
     try:
@@ -56,33 +113,183 @@ def _as_int(v, default=None):
 def _can_show_window_in_this_thread() -> bool:
     return not (_IS_DARWIN and threading.current_thread() is not threading.main_thread())
 
+class HeadController:
+    """
+    팬/틸트 PID를 카메라와 분리된 고정 주기 루프에서 돌리는 제어기.
+    - 트래커는 update_target()으로 최신 오차(픽셀)와 촬영 시각만 넘깁니다.
+    - 제어 루프는 실제 경과 시간(dt)을 써서 I/D 항과 위치 변화를 계산하므로
+      카메라나 추론 FPS가 달라져도 고개 반응 속도가 같습니다.
+    """
+    def __init__(self, port: PortHandler, pkt: PacketHandler, lock: threading.Lock,
+                 stop_event: threading.Event, pan_pos: int, tilt_pos: int,
+                 hz: float = C.HEAD_CONTROL_HZ):
+        self.port, self.pkt, self.lock = port, pkt, lock
+        self.stop_event = stop_event
+        self.period = 1.0 / max(1.0, hz)
+        self._halt = threading.Event()
+
+        self._state_lock = threading.Lock()
+        self._target = None          # (error_pan, error_tilt, 촬영 시각)
+        self._derivative = (0.0, 0.0)
+        self._pan_pos, self._tilt_pos = float(pan_pos), float(tilt_pos)
+        self._written = (int(pan_pos), int(tilt_pos))
+        self._integral_pan = 0.0
+        self._integral_tilt = 0.0
+
+        self._thread = threading.Thread(target=self._run, name="head_control", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self, timeout: float | None = 1.0):
+        self._halt.set()
+        self._thread.join(timeout=timeout)
+
+    def update_target(self, error_pan: float, error_tilt: float, t_capture: float | None = None):
+        """트래커가 새 측정값을 넘깁니다. D 항은 측정 사이의 실제 시간 간격으로 계산합니다."""
+        t_capture = time.perf_counter() if t_capture is None else t_capture
+        with self._state_lock:
+            prev = self._target
+            if prev is not None and t_capture > prev[2]:
+                dt = t_capture - prev[2]
+                self._derivative = ((error_pan - prev[0]) / dt, (error_tilt - prev[1]) / dt)
+            else:
+                self._derivative = (0.0, 0.0)
+            self._target = (error_pan, error_tilt, t_capture)
+
+    def clear_target(self):
+        with self._state_lock:
+            self._target = None
+            self._derivative = (0.0, 0.0)
+            self._integral_pan = self._integral_tilt = 0.0
+
+    def set_position(self, pan_pos: int, tilt_pos: int, write: bool = False):
+        """모드 전환 등으로 기준 위치를 바꿉니다. write=True면 즉시 모터에 씁니다."""
+        with self._state_lock:
+            self._target = None
+            self._derivative = (0.0, 0.0)
+            self._integral_pan = self._integral_tilt = 0.0
+            self._pan_pos, self._tilt_pos = float(pan_pos), float(tilt_pos)
+            self._written = (int(pan_pos), int(tilt_pos))
+        if write:
+            with self.lock:
+                io.write4(self.pkt, self.port, C.PAN_ID, C.ADDR_GOAL_POSITION, int(pan_pos))
+                io.write4(self.pkt, self.port, C.TILT_ID, C.ADDR_GOAL_POSITION, int(tilt_pos))
+
+    def _step(self, now: float, dt: float):
+        with self._state_lock:
+            target = self._target
+            if target is None:
+                return
+            if now - target[2] > C.HEAD_TARGET_TIMEOUT:
+                # 오래된 목표로 계속 움직이지 않도록 멈춥니다.
+                self._integral_pan = self._integral_tilt = 0.0
+                return
+
+            error_pan, error_tilt, _ = target
+            if abs(error_pan) > C.DEAD_ZONE or abs(error_tilt) > C.DEAD_ZONE:
+                # I 항: 오차 × 시간 누적 (Integral Windup 방지)
+                self._integral_pan = io.clamp(self._integral_pan + error_pan * dt, -C.INTEGRAL_LIMIT, C.INTEGRAL_LIMIT)
+                self._integral_tilt = io.clamp(self._integral_tilt + error_tilt * dt, -C.INTEGRAL_LIMIT, C.INTEGRAL_LIMIT)
+                derivative_pan, derivative_tilt = self._derivative
+
+                # P + I + D = 초당 위치 변화량 → dt를 곱해 이번 주기의 이동량으로 변환
+                pan_rate = (error_pan * C.KP_PAN) + (self._integral_pan * C.KI_PAN) + (derivative_pan * C.KD_PAN)
+                tilt_rate = (error_tilt * C.KP_TILT) + (self._integral_tilt * C.KI_TILT) + (derivative_tilt * C.KD_TILT)
+                self._pan_pos = io.clamp(self._pan_pos + C.PAN_SIGN * pan_rate * dt, C.SERVO_MIN, C.SERVO_MAX)
+                self._tilt_pos = io.clamp(self._tilt_pos + C.TILT_SIGN * tilt_rate * dt, C.SERVO_MIN, C.TILT_POS_MAX)
+            else:
+                # 목표에 도달하면 I값 초기화
+                self._integral_pan = self._integral_tilt = 0.0
+
+            pan_pos, tilt_pos = int(self._pan_pos), int(self._tilt_pos)
+            last_pan, last_tilt = self._written
+            if abs(pan_pos - last_pan) < C.MIN_MOVE_DELTA and abs(tilt_pos - last_tilt) < C.MIN_MOVE_DELTA:
+                # 작은 변화는 모아서 보내 버스(다른 모터와 공유)를 아낍니다.
+                return
+            self._written = (pan_pos, tilt_pos)
+
+        with self.lock:
+            io.write4(self.pkt, self.port, C.PAN_ID,  C.ADDR_GOAL_POSITION, pan_pos)
+            io.write4(self.pkt, self.port, C.TILT_ID, C.ADDR_GOAL_POSITION, tilt_pos)
+
+    def _run(self):
+        last_t = time.perf_counter()
+        next_t = last_t
+        while not self.stop_event.is_set() and not self._halt.is_set():
+            next_t += self.period
+            now = time.perf_counter()
+            dt, last_t = now - last_t, now
+            try:
+                self._step(now, dt)
+            except Exception as e:
+                print(f"⚠️ 고개 제어 루프 오류: {e}")
+            remaining = next_t - time.perf_counter()
+            if remaining > 0:
+                self._halt.wait(remaining)
+            else:
+                next_t = time.perf_counter()  # 밀렸으면 주기를 다시 맞춥니다.
+
 # [수정] shared_state 파라미터를 다시 받도록 수정
 def face_tracker_worker(port: PortHandler, pkt: PacketHandler, lock: threading.Lock,
-                        stop_event: threading.Event, video_frame_q: queue.Queue,
+                        stop_event: threading.Event, frame_bus: FrameBus,
                         sleepy_event: threading.Event,
                         shared_state: dict,
                         camera_index: int = 1,
                         draw_mesh: bool = True,
-                        print_debug: bool = True):
-
+                        print_debug: bool = True,
+                        live_stream: bool | None = None,
+                        source: str | int | None = None,
+                        result_bus: LatestBus | None = None):
+    """
+    source를 주면 camera_index 대신 그 영상 소스(카메라 인덱스 또는 녹화 파일 경로)를 씁니다.
+    result_bus를 주면 프레임마다 TrackResult(박스, 코 위치, 좌우 인원 수, 촬영 시각)를 올립니다.
+    OX 퀴즈는 이 결과를 그대로 받아 세므로 얼굴 인식을 따로 돌리지 않습니다.
+    live_stream=True면 FaceLandmarker를 LIVE_STREAM 모드(detect_async)로 돌립니다.
+    추론 결과는 콜백으로 전달되고, 캡처는 카메라 속도로 계속되며
+    추론이 밀리면 MediaPipe가 프레임을 알아서 버립니다.
+    """
     cv2, mp = suppress.import_cv2_mp()
 
+    if live_stream is None:
+        live_stream = C.FACE_LIVE_STREAM
+
     model_asset_path = 'models/face_landmarker.task'
 
+    # 비동기 모드에서 콜백이 원본 프레임을 찾을 수 있도록 timestamp → (frame, 촬영 시각) 보관
+    pending: dict[int, tuple] = {}
+    pending_lock = threading.Lock()
+
+    def on_result(res, output_image, timestamp_ms: int):
+        with pending_lock:
+            item = pending.pop(timestamp_ms, None)
+            # 추론이 밀려 버려진 프레임은 정리합니다.
+            for ts in [ts for ts in pending if ts < timestamp_ms]:
+                del pending[ts]
+        if item is None:
+            return
+        if crowd_thread is not None and shared_state.get('mode') == 'ox_quiz':
+            return  # 모드 전환 직전에 넣은 프레임의 늦은 결과는 군중 검출 결과와 섞지 않습니다.
+        try:
+            handle_result(res, *item)
+        except Exception as e:
+            print(f"⚠️ 얼굴 인식 결과 처리 오류: {e}")
+
     try:
         base_options = python.BaseOptions(model_asset_path=model_asset_path)
         options = vision.FaceLandmarkerOptions(
             base_options=base_options,
-            running_mode=vision.RunningMode.VIDEO,
+            running_mode=vision.RunningMode.LIVE_STREAM if live_stream else vision.RunningMode.VIDEO,
             num_faces=20,
             min_face_detection_confidence=0.5,
             min_face_presence_confidence=0.5,
             min_tracking_confidence=0.5,
             output_face_blendshapes=False,
-            output_facial_transformation_matrixes=False
+            output_facial_transformation_matrixes=False,
+            result_callback=on_result if live_stream else None
         )
         landmarker = vision.FaceLandmarker.create_from_options(options)
-        print("✅ 최신 FaceLandmarker 모델 로딩 완료.")
+        print(f"✅ 최신 FaceLandmarker 모델 로딩 완료. ({'LIVE_STREAM' if live_stream else 'VIDEO'})")
 
     except Exception as e:
         print(f"❌ FaceLandmarker 모델 로딩 실패: {e}")
@@ -97,181 +304,227 @@ def face_tracker_worker(port: PortHandler, pkt: PacketHandler, lock: threading.L
 
     home_pan_pos = read_pos(C.PAN_ID)
     home_tilt_pos = read_pos(C.TILT_ID)
-    pan_pos  = home_pan_pos
-    tilt_pos = home_tilt_pos
     if print_debug:
-        print(f"▶ Initial(Home) pan={pan_pos}, tilt={tilt_pos}")
+        print(f"▶ Initial(Home) pan={home_pan_pos}, tilt={home_tilt_pos}")
 
-    print(f"▶ 카메라({camera_index})를 여는 중입니다...")
-    cap = cv2.VideoCapture(camera_index, cv2.CAP_DSHOW)
+    cap = open_source(camera_index if source is None else source)
+    print(f"▶ {cap.name}를 여는 중입니다...")
     
-    if not cap.isOpened():
-        print(f"⚠️ 카메라({camera_index}) 열기 실패")
+    if not cap.open():
+        print(f"⚠️ {cap.name} 열기 실패")
         landmarker.close(); return
-    print(f"✅ 카메라({camera_index})가 성공적으로 열렸습니다.")
-    
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
+    print(f"✅ {cap.name}가 성공적으로 열렸습니다.")
 
     last_mode = shared_state.get('mode', 'tracking')
 
-    last_error_pan = 0
-    last_error_tilt = 0
-    integral_pan = 0
-    integral_tilt = 0
-
+    head = HeadController(port, pkt, lock, stop_event, home_pan_pos, home_tilt_pos)
+    head.start()
+    print(f"▶ 고개 제어 루프 시작 ({C.HEAD_CONTROL_HZ:.0f}Hz)")
+
+    # OX 퀴즈 참가자 ID. OX 모드에 들어올 때마다 새로 매기고, 모드가 유지되는 동안(라운드 사이 포함) 이어집니다.
+    face_ids = FaceIdTracker(C.OX_ID_MIN_IOU, max_missed=C.OX_ID_MAX_MISSED)
+
+    mode_lock = threading.Lock()
+
+    def sync_mode(current_mode: str):
+        """모드가 바뀌었으면 고개 위치를 맞춥니다. 캡처 스레드와 군중 검출 스레드가 같이 부릅니다."""
+        nonlocal last_mode
+        with mode_lock:
+            if current_mode == last_mode:
+                return
+            if current_mode == 'ox_quiz':
+                print("▶ Mode changed to OX_QUIZ: Resetting motor position.")
+                head.set_position(home_pan_pos, home_tilt_pos, write=True)
+                face_ids.reset()
+
+            elif current_mode == 'tracking':
+                print("▶ Mode changed to Tracking: Re-reading current motor position.")
+                head.set_position(read_pos(C.PAN_ID), read_pos(C.TILT_ID))
+            else:
+                head.clear_target()
+            last_mode = current_mode
+
+    def handle_result(res, frame, t_capture: float, crowd_result=None):
+        """
+        한 프레임의 추론 결과로 모드 전환과 고개 목표를 처리하고 결과 레코드를 내보냅니다.
+        crowd_result(boxes, noses, ms)를 주면 res 대신 군중 검출 결과를 씁니다.
+        """
+        h, w = frame.shape[:2]
+        cx, cy = w // 2, h // 2
+
+        if crowd_result is not None:
+            boxes, noses, infer_ms = crowd_result
+        else:
+            # 랜드마크는 프레임당 한 번만 배열로 바꿔서 모든 후처리에 씁니다.
+            faces = L.to_array(res.face_landmarks)
+            boxes, noses, infer_ms = L.boxes(faces), L.nose_points(faces), 0.0
+        result = TrackResult(mode=shared_state.get('mode', 'tracking'), timestamp=t_capture,
+                             boxes=boxes, noses=noses, show_boxes=draw_mesh, infer_ms=infer_ms)
+        current_mode = result.mode
+        sync_mode(current_mode)
+
+        if current_mode == 'tracking':
+            if not sleepy_event.is_set():
+                if len(noses):
+                    nx, ny = int(noses[0, 0] * w), int(noses[0, 1] * h)
+
+                    # 제어는 HeadController가 고정 주기로 수행합니다. 여기서는 최신 오차만 넘깁니다.
+                    head.update_target(nx - cx, cy - ny, t_capture)
+                    result.target = (float(noses[0, 0]), float(noses[0, 1]))
+                else:
+                    head.clear_target()
+            else:
+                head.clear_target()
+                result.sleepy = True
+
+        elif current_mode == 'ox_quiz':
+            result.left_count, result.right_count = L.side_counts(noses[:, 0])
+            result.ids = face_ids.update(boxes)
+
+        # 오버레이는 여기서 그리지 않습니다. 표시 스레드가 화면에 띄울 때만 그립니다.
+        _publish_result(result)
+        if result_bus is not None:
+            result_bus.publish(result, t_capture)
+
+    def crowd_worker():
+        """
+        OX 퀴즈 동안에만 군중 검출기를 만들어 FrameBus 프레임을 검출합니다.
+        모델 로딩과 검출 모두 이 스레드에서 하므로 캡처/고개 제어가 멈추지 않고,
+        모드가 바뀌면 검출기를 닫아 메모리를 돌려줍니다.
+        """
+        rgb = RgbConverter()
+        while not stop_event.is_set() and not crowd_halt.is_set() and not frame_bus.closed:
+            if shared_state.get('mode') != 'ox_quiz':
+                stop_event.wait(0.2)
+                continue
+            try:
+                crowd = CrowdDetector()
+            except Exception as e:
+                print(f"❌ OX 군중 검출기 로딩 실패: {e}")
+                stop_event.wait(5.0)
+                continue
+            try:
+                with frame_bus.subscribe() as frames:
+                    while (not stop_event.is_set() and not crowd_halt.is_set() and not frame_bus.closed
+                           and shared_state.get('mode') == 'ox_quiz'):
+                        item = frames.wait_next(timeout=0.2)
+                        if item is None:
+                            continue
+                        try:
+                            detected = crowd.detect(rgb.image_of(item).numpy_view())
+                            handle_result(None, item.data, item.timestamp, crowd_result=detected)
+                        except Exception as e:
+                            print(f"⚠️ OX 군중 검출 오류: {e}")
+            finally:
+                crowd.close()
+                print("▶ OX 군중 검출기 해제")
+
+    crowd_halt = threading.Event()  # 캡처 루프가 끝나면 군중 검출 스레드도 멈춥니다.
+    crowd_thread = None
+    if C.OX_DETECT_MODE != 'frame':
+        crowd_thread = threading.Thread(target=crowd_worker, name="ox-crowd", daemon=True)
+        crowd_thread.start()
+
+    # 반전 + BGR→RGB + mp.Image 생성을 여기서 한 번만 하고 모든 소비자가 같이 씁니다.
+    prep = FramePreprocessor()
+
+    last_ts = -1
     try:
         while not stop_event.is_set():
-            ok, frame = cap.read()
+            ok, raw, t_capture = cap.read()
             if not ok: break
 
-            frame = cv2.flip(frame, 1)
+            frame, mp_image = prep.process(raw)
 
-            try:
-                if not video_frame_q.full():
-                    video_frame_q.put_nowait(frame.copy())
-            except Exception: pass
-            
-            h, w = frame.shape[:2]
-            cx, cy = w // 2, h // 2
-
-            # mediapipe 처리를 위해 BGR -> RGB 변환
-            mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
-            
-            frame_timestamp_ms = int(time.perf_counter() * 1000)
-            res = landmarker.detect_for_video(mp_image, frame_timestamp_ms)
-            
-            current_mode = shared_state.get('mode', 'tracking')
-
-            if current_mode != last_mode:
-                if current_mode == 'ox_quiz':
-                    print("▶ Mode changed to OX_QUIZ: Resetting motor position.")
-                    pan_pos, tilt_pos = home_pan_pos, home_tilt_pos
-                    with lock:
-                        io.write4(pkt, port, C.PAN_ID, C.ADDR_GOAL_POSITION, pan_pos)
-                        io.write4(pkt, port, C.TILT_ID, C.ADDR_GOAL_POSITION, tilt_pos)
-                
-                elif current_mode == 'tracking':
-                    print("▶ Mode changed to Tracking: Re-reading current motor position.")
-                    pan_pos = read_pos(C.PAN_ID)
-                    tilt_pos = read_pos(C.TILT_ID)
-                last_mode = current_mode
-
-            if current_mode == 'tracking':
-                if not sleepy_event.is_set():
-                    if res.face_landmarks:
-                        lm = res.face_landmarks[0][1]
-                        nx, ny = int(lm.x * w), int(lm.y * h)
-
-                        error_pan = nx - cx
-                        error_tilt = cy - ny
-
-                        if abs(error_pan) > C.DEAD_ZONE or abs(error_tilt) > C.DEAD_ZONE:
-                            # 2. 오차 누적 (I Term)
-                            integral_pan += error_pan
-                            integral_tilt += error_tilt
-                            # I 값이 너무 커지는 것을 방지 (Integral Windup 방지)
-                            integral_pan = io.clamp(integral_pan, -200, 200)
-                            integral_tilt = io.clamp(integral_tilt, -200, 200)
-
-                            # 3. 오차의 변화량 계산 (D Term)
-                            derivative_pan = error_pan - last_error_pan
-                            derivative_tilt = error_tilt - last_error_tilt
-                            
-                            # 4. 최종 제어량 계산 = P + I + D
-                            pan_delta = (error_pan * C.KP_PAN) + (integral_pan * C.KI_PAN) + (derivative_pan * C.KD_PAN)
-                            tilt_delta = (error_tilt * C.KP_TILT) + (integral_tilt * C.KI_TILT) + (derivative_tilt * C.KD_TILT)
-                        else:
-                            pan_delta, tilt_delta = 0, 0
-                            # 목표에 도달하면 I값 초기화
-                            integral_pan, integral_tilt = 0, 0
-
-                        # 5. 다음 프레임을 위해 현재 오차를 '이전 오차'로 저장
-                        last_error_pan = error_pan
-                        last_error_tilt = error_tilt
-                        
-                        # 6. 최종 위치 업데이트
-                        pan_pos  = int(io.clamp(pan_pos  + C.PAN_SIGN  * pan_delta,  C.SERVO_MIN, C.SERVO_MAX))
-                        tilt_pos = int(io.clamp(tilt_pos + C.TILT_SIGN * tilt_delta, C.SERVO_MIN, C.TILT_POS_MAX)) # 👈 SERVO_MAX를 TILT_POS_MAX로 변경
-
-                        # --- ✅ PID 제어 로직 끝 ---
-
-                        with lock:
-                            io.write4(pkt, port, C.PAN_ID,  C.ADDR_GOAL_POSITION, pan_pos)
-                            io.write4(pkt, port, C.TILT_ID, C.ADDR_GOAL_POSITION, tilt_pos)
-                        
-                        cv2.circle(frame, (cx, cy), 5, (255, 0, 0), -1)
-                        cv2.circle(frame, (nx, ny), 5, (0, 0, 255), -1)
-                        cv2.putText(frame, "Mode: Tracking", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 255, 0), 2)
-                else:
-                    cv2.putText(frame, "Mode: Tracking (Sleepy)", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (128, 128, 128), 2)
-            
-            # --- 수정된 부분 시작 ---
-            elif current_mode == 'ox_quiz':
-
-                left_count, right_count = 0, 0
-                if res.face_landmarks:
-                    for face_landmarks in res.face_landmarks:
-                        nose_landmark = face_landmarks[1] # 코 위치 기준
-                        face_x_position = int(nose_landmark.x * w)
-                        if face_x_position < cx:
-                            left_count += 1
-                        else:
-                            right_count += 1
-
-                # 1. 화면 중앙에 흰색 세로선 그리기
-                cv2.line(frame, (cx, 0), (cx, h), (255, 255, 255), 3)
-
-                # 2. 왼쪽 상단에 'X' 표시 (빨간색)
-                cv2.putText(frame, "X", (40, 80), cv2.FONT_HERSHEY_TRIPLEX, 3, (0, 0, 255), 7)
-                cv2.putText(frame, f": {left_count}", (160, 80), cv2.FONT_HERSHEY_SIMPLEX, 3, (0, 0, 255), 7)
-
-                # 3. 오른쪽 상단에 'O' 표시 (초록색)
-                cv2.putText(frame, "O", (w - 250, 80), cv2.FONT_HERSHEY_TRIPLEX, 3, (0, 255, 0), 7)
-                cv2.putText(frame, f": {right_count}", (w - 130, 80), cv2.FONT_HERSHEY_SIMPLEX, 3, (0, 255, 0), 7)
-                
-                # 4. 화면 하단에 총 인원 수 표시
-                total_faces = left_count + right_count
-                count_text = f"Total: {total_faces}"
-                text_size = cv2.getTextSize(count_text, cv2.FONT_HERSHEY_SIMPLEX, 1.2, 3)[0]
-                text_x = w - text_size[0] - 20
-                text_y = h - 30
-                cv2.putText(frame, count_text, (text_x, text_y), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (255, 255, 255), 3)
-            # --- 수정된 부분 끝 ---
-
-            if draw_mesh and res.face_landmarks:
-                for landmark_list in res.face_landmarks:
-                    x_min = min([landmark.x for landmark in landmark_list])
-                    y_min = min([landmark.y for landmark in landmark_list])
-                    x_max = max([landmark.x for landmark in landmark_list])
-                    y_max = max([landmark.y for landmark in landmark_list])
-                    start_point = (int(x_min * w), int(y_min * h))
-                    end_point = (int(x_max * w), int(y_max * h))
-                    cv2.rectangle(frame, start_point, end_point, (0, 255, 0), 2)
-            
-            _publish_frame(frame)
+            # 구독 중인 소비자가 있을 때만 복사 없이 올립니다. 이후 이 프레임은 수정하지 않습니다.
+            frame_bus.publish(frame, t_capture, image=mp_image)
+
+            if crowd_thread is not None and shared_state.get('mode') == 'ox_quiz':
+                # OX 퀴즈 중에는 고개가 홈 위치에 고정되므로 추적용 추론은 쉬고,
+                # 군중 검출 스레드가 위에서 올린 프레임을 받아 처리합니다.
+                sync_mode('ox_quiz')
+                continue
+
+            # MediaPipe는 단조 증가하는 timestamp를 요구합니다.
+            frame_timestamp_ms = max(int(t_capture * 1000), last_ts + 1)
+            last_ts = frame_timestamp_ms
+
+            if live_stream:
+                with pending_lock:
+                    pending[frame_timestamp_ms] = (frame, t_capture)
+                    while len(pending) > 8:
+                        del pending[min(pending)]
+                # 즉시 반환합니다. 결과는 on_result 콜백으로 들어옵니다.
+                landmarker.detect_async(mp_image, frame_timestamp_ms)
+            else:
+                res = landmarker.detect_for_video(mp_image, frame_timestamp_ms)
+                handle_result(res, frame, t_capture)
 
     finally:
+        head.stop()
         try: cap.release()
         except Exception: pass
+        crowd_halt.set()
+        if crowd_thread is not None:
+            crowd_thread.join(timeout=2.0)
         landmarker.close()
 
 # display_loop는 shared_state를 직접 제어하지 않으므로 수정할 필요 없음
-def display_loop_main_thread(stop_event: threading.Event, window_name: str = "Auto-Track Face Center"):
+def display_loop_main_thread(stop_event: threading.Event, window_name: str = "Auto-Track Face Center",
+                             frame_bus: FrameBus | None = None):
+    """
+    카메라 미리보기 창을 띄웁니다. 프레임은 frame_bus를 구독해서 받습니다.
+    PREVIEW 환경변수로 비용을 조절합니다.
+    - full      : 모든 프레임을 원본 크기로 표시 (예전 동작)
+    - throttled : PREVIEW_SCALE로 축소하고 최대 PREVIEW_FPS로만 표시
+    - off       : 창을 띄우지 않고 종료 신호만 기다림 (구독하지 않으므로 프레임도 올라오지 않음)
+    오버레이는 가장 최근 결과 레코드로 그리므로 추론이 끝나기 전 프레임이면 한 장 늦을 수 있습니다.
+    """
+    mode = C.PREVIEW_MODE
+    if mode == 'off' or frame_bus is None:
+        print("ℹ️ 카메라 미리보기 꺼짐" + (" (PREVIEW=off)" if mode == 'off' else " (frame_bus 없음)"))
+        # 짧게 나눠 기다려야 메인 스레드가 SIGINT/종료 신호에 바로 반응합니다.
+        while not stop_event.wait(0.1):
+            pass
+        return
+
     cv2, _ = suppress.import_cv2_mp()
     if not _can_show_window_in_this_thread():
         print("⚠️ display_loop_main_thread는 반드시 메인 스레드에서 호출해야 합니다.")
         return
+
+    throttled = (mode == 'throttled')
+    interval = 1.0 / max(0.1, C.PREVIEW_FPS) if throttled else 0.0
+    scale = C.PREVIEW_SCALE if throttled else 1.0
+    print(f"▶ 카메라 미리보기: {mode}" + (f" ({C.PREVIEW_FPS:g}fps, x{scale:g})" if throttled else ""))
+
+    next_show = 0.0
+    sub = frame_bus.subscribe()
     try:
         while not stop_event.is_set():
-            try:
-                frame = _DISPLAY_Q.get(timeout=0.05)
-            except queue.Empty:
+            remaining = next_show - time.perf_counter()
+            if remaining > 0:
+                # 다음 표시 시각까지는 창 이벤트만 처리하며 쉽니다.
+                key = cv2.waitKey(max(1, int(remaining * 1000))) & 0xFF
+                if key == 27: # ESC 키로 종료
+                    stop_event.set(); break
+                continue
+            item = sub.wait_next(timeout=0.05)
+            if item is None:
+                if sub.closed:
+                    break
                 continue
+            next_show = time.perf_counter() + interval
+            if scale != 1.0:
+                frame = cv2.resize(item.data, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+            else:
+                frame = item.data.copy()  # 버스 프레임은 읽기 전용이라 그릴 때만 복사합니다.
+            _draw_overlay(cv2, frame, _LATEST_RESULT)
             cv2.imshow(window_name, frame)
             key = cv2.waitKey(1) & 0xFF
             if key == 27: # ESC 키로 종료
                 stop_event.set(); break
     finally:
+        sub.close()
         try: cv2.destroyAllWindows()
-        except Exception: pass
\ No newline at end of file
+        except Exception: pass
@@ -0,0 +1,89 @@
+# ============================================================
+#Licensed to the Apache Software Foundation (ASF) under one
+#or more contributor license agreements.  See the NOTICE file
+#distributed with this work for additional information
+#regarding copyright ownership.  The ASF licenses this file
+#to you under the Apache License, Version 2.0 (the
+#"License"); you may not use this file except in compliance
+#with the License.  You may obtain a copy of the License at
+
+#    http://www.apache.org/licenses/LICENSE-2.0
+
+#Unless required by applicable law or agreed to in writing, software
+#distributed under the License is distributed on an "AS IS" BASIS,
+#WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#See the License for the specific language governing permissions and
+#limitations under the License.
+# ============================================================
+# function/face_ids.py
+# 프레임별 얼굴 박스에 라운드 내내 같은 ID를 붙이는 가벼운 추적기.
+# IoU 행렬(벡터 연산)로 먼저 짝짓고, 겹치지 않으면 중심 거리로 보조 매칭합니다.
+# 수십 명이어도 프레임당 (N x T) 행렬 하나라 비용이 거의 없습니다.
+
+from __future__ import annotations
+import numpy as np
+
+def iou_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """박스 (N,4)와 (T,4) 사이의 IoU (N,T). 박스는 [x0, y0, x1, y1]."""
+    x0 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y0 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x1 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y1 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x1 - x0, 0, None) * np.clip(y1 - y0, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-9), 0.0)
+
+class FaceIdTracker:
+    """
+    update(boxes)는 각 박스의 ID 배열을 돌려줍니다.
+    - min_iou 이상 겹치면 같은 사람, 아니면 중심 거리가 얼굴 폭 × max_center_dist 안일 때 같은 사람
+    - max_missed 프레임 동안 안 보인 ID는 버립니다.
+    """
+    def __init__(self, min_iou: float = 0.3, max_center_dist: float = 1.0, max_missed: int = 15):
+        self.min_iou = min_iou
+        self.max_center_dist = max_center_dist
+        self.max_missed = max_missed
+        self.reset()
+
+    def reset(self):
+        self._boxes = np.empty((0, 4), dtype=np.float32)
+        self._ids = np.empty((0,), dtype=np.int64)
+        self._missed = np.empty((0,), dtype=np.int32)
+        self._next_id = 1
+
+    def update(self, boxes: np.ndarray) -> np.ndarray:
+        n, t = len(boxes), len(self._boxes)
+        assigned = np.full(n, -1, dtype=np.int64)
+        matched_tracks = np.zeros(t, dtype=bool)
+
+        if n and t:
+            iou = iou_matrix(boxes, self._boxes)
+            centers = (boxes[:, :2] + boxes[:, 2:]) / 2
+            track_centers = (self._boxes[:, :2] + self._boxes[:, 2:]) / 2
+            dist = np.linalg.norm(centers[:, None, :] - track_centers[None, :, :], axis=2)
+            width = np.maximum(boxes[:, 2] - boxes[:, 0], 1e-6)[:, None]
+            near = dist / width
+            # 비용: IoU 매칭은 [0, 1), 거리 매칭은 [1, 2) — IoU로 짝지을 수 있으면 항상 우선합니다.
+            cost = np.where(iou >= self.min_iou, 1.0 - iou,
+                            np.where(near <= self.max_center_dist, 1.0 + near / self.max_center_dist, np.inf))
+            for flat in np.argsort(cost, axis=None):
+                d, k = divmod(int(flat), t)
+                if not np.isfinite(cost[d, k]):
+                    break
+                if assigned[d] < 0 and not matched_tracks[k]:
+                    assigned[d] = self._ids[k]
+                    matched_tracks[k] = True
+
+        # 짝이 없는 박스는 새 ID
+        new = assigned < 0
+        assigned[new] = np.arange(self._next_id, self._next_id + int(new.sum()))
+        self._next_id += int(new.sum())
+
+        # 트랙 갱신: 보인 ID는 새 박스로, 안 보인 ID는 missed 증가 후 오래되면 삭제
+        keep = ~matched_tracks & (self._missed + 1 <= self.max_missed)
+        self._boxes = np.concatenate([boxes.astype(np.float32), self._boxes[keep]], axis=0)
+        self._ids = np.concatenate([assigned, self._ids[keep]])
+        self._missed = np.concatenate([np.zeros(n, dtype=np.int32), self._missed[keep] + 1])
+        return assigned
@@ -0,0 +1,134 @@
+# ============================================================
+#Licensed to the Apache Software Foundation (ASF) under one
+#or more contributor license agreements.  See the NOTICE file
+#distributed with this work for additional information
+#regarding copyright ownership.  The ASF licenses this file
+#to you under the Apache License, Version 2.0 (the
+#"License"); you may not use this file except in compliance
+#with the License.  You may obtain a copy of the License at
+
+#    http://www.apache.org/licenses/LICENSE-2.0
+
+#Unless required by applicable law or agreed to in writing, software
+#distributed under the License is distributed on an "AS IS" BASIS,
+#WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#See the License for the specific language governing permissions and
+#limitations under the License.
+# ============================================================
+# function/frame_bus.py
+# 여러 소비자(가위바위보, OX, 미리보기, 녹화 등)가 복사 없이 최신 프레임을 나눠 받는 채널.
+# - 항목마다 순번(seq)과 촬영 시각이 붙습니다.
+# - 구독자마다 마지막으로 받은 seq를 따로 기억하므로 서로 프레임을 뺏지 않습니다.
+# - 활성 구독자가 없으면 publish()는 아무것도 하지 않습니다.
+
+from __future__ import annotations
+import threading
+from dataclasses import dataclass
+from typing import Any
+
+@dataclass(frozen=True)
+class BusItem:
+    seq: int
+    timestamp: float   # 촬영 시각 (time.perf_counter 초)
+    data: Any
+    image: Any = None  # 이미 변환된 RGB mp.Image (있으면 소비자가 다시 변환하지 않고 씁니다)
+
+class LatestBus:
+    """최신 값 하나만 보관하는 다중 구독 채널."""
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._latest: BusItem | None = None
+        self._seq = 0
+        self._subscribers = 0
+        self._closed = False
+
+    def has_subscribers(self) -> bool:
+        return self._subscribers > 0
+
+    def publish(self, data, timestamp: float, image=None) -> BusItem | None:
+        """구독자가 있을 때만 최신 값으로 올리고 기다리는 구독자를 깨웁니다."""
+        if self._subscribers == 0 or self._closed:
+            return None
+        data = self._freeze(data)
+        with self._cond:
+            self._seq += 1
+            item = BusItem(self._seq, timestamp, data, image)
+            self._latest = item
+            self._cond.notify_all()
+        return item
+
+    def _freeze(self, data):
+        return data
+
+    def subscribe(self) -> "Subscription":
+        return Subscription(self)
+
+    def close(self):
+        """종료 신호: 기다리던 구독자가 모두 None을 받고 빠져나옵니다."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+class FrameBus(LatestBus):
+    """
+    NumPy 프레임용 버스. 복사하지 않고 읽기 전용 뷰로 나눠 줍니다.
+    올린 배열은 이후 아무도 덮어쓰지 않아야 합니다. (재사용 버퍼를 올리면 소비자가 보는 프레임이 바뀝니다)
+    """
+    def _freeze(self, data):
+        view = data.view()
+        view.flags.writeable = False
+        return view
+
+class Subscription:
+    """
+    버스 구독. with 문으로 쓰면 끝날 때 자동으로 해지됩니다.
+    구독 이전에 올라온 값은 '새 값'으로 치지 않습니다.
+    """
+    def __init__(self, bus: LatestBus):
+        self._bus = bus
+        self._active = True
+        with bus._cond:
+            bus._subscribers += 1
+            self._last_seq = bus._seq
+
+    def latest(self) -> BusItem | None:
+        """기다리지 않고 지금 가장 최신 값을 돌려줍니다 (이미 받은 값일 수도 있음)."""
+        item = self._bus._latest
+        if item is not None:
+            self._last_seq = max(self._last_seq, item.seq)
+        return item
+
+    @property
+    def closed(self) -> bool:
+        """버스가 닫혔는지. wait_next()가 None을 주면 이 값을 보고 루프를 끝내세요. (닫힌 뒤에는 기다리지 않고 바로 None)"""
+        return self._bus._closed
+
+    def wait_next(self, timeout: float | None = None) -> BusItem | None:
+        """이 구독자가 아직 받지 않은 새 값이 올 때까지 기다립니다. 시간 초과/종료 시 None."""
+        bus = self._bus
+        with bus._cond:
+            ready = bus._cond.wait_for(
+                lambda: bus._closed or (bus._latest is not None and bus._latest.seq > self._last_seq),
+                timeout=timeout)
+            if not ready or bus._closed:
+                return None
+            item = bus._latest
+        self._last_seq = item.seq
+        return item
+
+    def close(self):
+        if not self._active:
+            return
+        self._active = False
+        with self._bus._cond:
+            self._bus._subscribers -= 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
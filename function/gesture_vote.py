@@ -0,0 +1,118 @@
+# ============================================================
+#Licensed to the Apache Software Foundation (ASF) under one
+#or more contributor license agreements.  See the NOTICE file
+#distributed with this work for additional information
+#regarding copyright ownership.  The ASF licenses this file
+#to you under the Apache License, Version 2.0 (the
+#"License"); you may not use this file except in compliance
+#with the License.  You may obtain a copy of the License at
+
+#    http://www.apache.org/licenses/LICENSE-2.0
+
+#Unless required by applicable law or agreed to in writing, software
+#distributed under the License is distributed on an "AS IS" BASIS,
+#WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#See the License for the specific language governing permissions and
+#limitations under the License.
+# ============================================================
+# function/gesture_vote.py
+# 최근 몇 초 동안의 (제스처, 점수, 시각)을 점수 합(신뢰도 질량)으로 투표해서
+# 한 클래스가 충분히 앞서면 바로 결정합니다. 한두 프레임 오인식에 흔들리지 않습니다.
+
+from __future__ import annotations
+from collections import deque
+from dataclasses import dataclass
+import numpy as np
+
+@dataclass
+class VoteDecision:
+    label: str
+    mass: float        # 이긴 클래스의 점수 합
+    margin: float      # 2등과의 점수 합 차이
+    latency: float     # 첫 유효 인식부터 결정까지 걸린 시간 (초)
+    votes: int         # 창 안에 있던 유효 프레임 수
+    early: bool        # 질량 기준으로 일찍 결정됐는지 (False면 시간 초과로 최선값 선택)
+
+class GestureVoter:
+    """
+    add()로 프레임별 인식 결과를 넣고, 결정이 나면 VoteDecision을 돌려받습니다.
+    - window: 이 시간(초)보다 오래된 표는 버립니다.
+    - decide_mass: 1등 클래스의 점수 합이 이 값 이상이고
+    - min_margin: 2등과의 차이도 이 값 이상이면 바로 결정합니다.
+    """
+    def __init__(self, window: float, decide_mass: float, min_margin: float):
+        self.window = window
+        self.decide_mass = decide_mass
+        self.min_margin = min_margin
+        self._votes: deque[tuple[str, float, float]] = deque()
+        self._mass: dict[str, float] = {}
+        self.first_t: float | None = None
+
+    def _ranked(self) -> list[tuple[str, float]]:
+        return sorted(self._mass.items(), key=lambda kv: kv[1], reverse=True)
+
+    def _decision(self, t: float, early: bool) -> VoteDecision | None:
+        ranked = self._ranked()
+        if not ranked or ranked[0][1] <= 0:
+            return None
+        label, mass = ranked[0]
+        second = ranked[1][1] if len(ranked) > 1 else 0.0
+        first_t = t if self.first_t is None else self.first_t
+        return VoteDecision(label, mass, mass - second, t - first_t, len(self._votes), early)
+
+    def add(self, label: str, score: float, t: float) -> VoteDecision | None:
+        if self.first_t is None:
+            self.first_t = t
+        self._votes.append((label, score, t))
+        self._mass[label] = self._mass.get(label, 0.0) + score
+        while self._votes and self._votes[0][2] < t - self.window:
+            old_label, old_score, _ = self._votes.popleft()
+            self._mass[old_label] -= old_score
+
+        decision = self._decision(t, early=True)
+        if decision and decision.mass >= self.decide_mass and decision.margin >= self.min_margin:
+            return decision
+        return None
+
+    def best(self, t: float) -> VoteDecision | None:
+        """시간이 다 됐을 때 창 안에서 점수 합이 가장 큰 클래스를 고릅니다."""
+        return self._decision(t, early=False)
+
+class PlayerSlots:
+    """
+    여러 손을 한 판 동안 같은 플레이어 번호에 묶어 둡니다.
+    손의 x좌표(정규화)를 기존 슬롯 중심과 가까운 순서대로 짝짓고, 남는 손은 새 슬롯이 됩니다.
+    번호는 order()에서 슬롯 중심의 왼쪽→오른쪽 순서로 매깁니다.
+    """
+    def __init__(self, max_players: int, match_dist: float = 0.15, smoothing: float = 0.3):
+        self.max_players = max_players
+        self.match_dist = match_dist
+        self.smoothing = smoothing
+        self.centers: list[float] = []
+
+    def assign(self, xs: np.ndarray) -> list[int | None]:
+        """손별 x좌표 → 슬롯 번호 목록 (슬롯이 꽉 차서 못 붙인 손은 None)."""
+        slots: list[int | None] = [None] * len(xs)
+        if len(xs) == 0:
+            return slots
+        if self.centers:
+            dist = np.abs(xs[:, None] - np.asarray(self.centers)[None, :])
+            # 가까운 쌍부터 하나씩 짝짓습니다 (손도 슬롯도 한 번씩만).
+            for flat in np.argsort(dist, axis=None):
+                hand, slot = divmod(int(flat), dist.shape[1])
+                if dist[hand, slot] > self.match_dist:
+                    break
+                if slots[hand] is None and slot not in slots:
+                    slots[hand] = slot
+        for hand in np.argsort(xs):
+            if slots[hand] is None and len(self.centers) < self.max_players:
+                self.centers.append(float(xs[hand]))
+                slots[hand] = len(self.centers) - 1
+        for hand, slot in enumerate(slots):
+            if slot is not None:
+                self.centers[slot] += self.smoothing * (float(xs[hand]) - self.centers[slot])
+        return slots
+
+    def order(self) -> list[int]:
+        """슬롯 번호를 화면 왼쪽→오른쪽 순서로 정렬해 돌려줍니다."""
+        return sorted(range(len(self.centers)), key=lambda i: self.centers[i])
@@ -0,0 +1,58 @@
+# ============================================================
+#Licensed to the Apache Software Foundation (ASF) under one
+#or more contributor license agreements.  See the NOTICE file
+#distributed with this work for additional information
+#regarding copyright ownership.  The ASF licenses this file
+#to you under the Apache License, Version 2.0 (the
+#"License"); you may not use this file except in compliance
+#with the License.  You may obtain a copy of the License at
+
+#    http://www.apache.org/licenses/LICENSE-2.0
+
+#Unless required by applicable law or agreed to in writing, software
+#distributed under the License is distributed on an "AS IS" BASIS,
+#WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#See the License for the specific language governing permissions and
+#limitations under the License.
+# ============================================================
+# function/landmarks.py
+# FaceLandmarker 결과에서 필요한 점(얼굴 윤곽 + 코)만 NumPy 배열로 한 번 바꾸고,
+# 박스/코 위치/좌우 인원 수를 벡터 연산으로 계산하는 헬퍼 모음.
+
+from __future__ import annotations
+import numpy as np
+
+NUM_LANDMARKS = 478
+NOSE_INDEX = 1  # 코 위치 기준 랜드마크
+# 얼굴 윤곽(FACEMESH_FACE_OVAL) 36점. 478점 전체의 최소/최대와 거의 같은 박스를 1/13 비용으로 얻습니다.
+FACE_OVAL = (10, 338, 297, 332, 284, 251, 389, 356, 454, 323, 361, 288, 397, 365, 379, 378, 400, 377,
+             152, 148, 176, 149, 150, 136, 172, 58, 132, 93, 234, 127, 162, 21, 54, 103, 67, 109)
+POINTS = FACE_OVAL + (NOSE_INDEX,)  # to_array가 꺼내는 랜드마크 (마지막이 코)
+
+def to_array(face_landmarks) -> np.ndarray:
+    """
+    res.face_landmarks → (N_faces, len(POINTS), 2) float32 배열 (정규화 x, y).
+    호출하는 쪽은 박스와 코 위치만 쓰므로 윤곽 + 코 37점만 꺼냅니다.
+    """
+    if not face_landmarks:
+        return np.empty((0, len(POINTS), 2), dtype=np.float32)
+    return np.array([[(face[i].x, face[i].y) for i in POINTS] for face in face_landmarks], dtype=np.float32)
+
+def boxes(faces: np.ndarray) -> np.ndarray:
+    """얼굴별 정규화 박스 (N, 4) = [x_min, y_min, x_max, y_max]."""
+    oval = faces[:, :-1]
+    return np.concatenate([oval.min(axis=1), oval.max(axis=1)], axis=1)
+
+def nose_points(faces: np.ndarray) -> np.ndarray:
+    """얼굴별 정규화 코 위치 (N, 2)."""
+    return faces[:, -1]
+
+def side_counts(nose_x: np.ndarray, split: float = 0.5) -> tuple[int, int]:
+    """코 x좌표(정규화)를 화면 중앙 기준으로 나눠 (왼쪽, 오른쪽) 인원 수를 셉니다."""
+    left = int(np.count_nonzero(nose_x < split))
+    return left, int(nose_x.shape[0]) - left
+
+def to_pixels(points: np.ndarray, w: int, h: int) -> np.ndarray:
+    """정규화 좌표 [..., (x, y)*k]를 픽셀 정수 좌표로 바꿉니다."""
+    scale = np.tile(np.array([w, h], dtype=np.float32), points.shape[-1] // 2)
+    return (points * scale).astype(np.int32)
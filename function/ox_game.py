@@ -17,104 +17,130 @@
 # ============================================================
 # ox_game.py
 
-import cv2
-import mediapipe as mp
 import time
 import queue
 import threading
-import os
-from mediapipe.tasks import python
-from mediapipe.tasks.python import vision
+from collections import deque
+import numpy as np
+from . import config as C
+from .frame_bus import LatestBus
+
+class CountSeries:
+    """
+    프레임별 (시각, 왼쪽, 오른쪽) 인원 수를 모아 최근 window초의 중앙값으로 판정합니다.
+    한두 프레임의 눈 깜빡임/가림이 결과를 바꾸지 못하고, 중앙값이 계속 같으면 안정된 것으로 봅니다.
+    """
+    def __init__(self, window: float):
+        self.window = window
+        self._samples: deque[tuple[float, int, int]] = deque()
+        self.current: tuple[int, int] | None = None
+        self.stable_since: float | None = None
+
+    def add(self, t: float, left: int, right: int) -> tuple[int, int]:
+        self._samples.append((t, left, right))
+        while self._samples[0][0] < t - self.window:
+            self._samples.popleft()
+        counts = np.array([(l, r) for _, l, r in self._samples], dtype=np.int32)
+        median = tuple(int(v) for v in np.round(np.median(counts, axis=0)))
+        if median != self.current:
+            self.current, self.stable_since = median, t
+        return median
+
+    def stable_for(self, t: float) -> float:
+        return 0.0 if self.stable_since is None else t - self.stable_since
+
+class RoundRoster:
+    """
+    라운드 동안 참가자 ID별 마지막 위치(쪽)와 본 횟수를 기록합니다.
+    sides()는 라운드 끝 무렵(최근 window초)에 보인 ID만 골라 {ID: 'O' 또는 'X'}를 돌려줍니다.
+    화면 오른쪽이 O, 왼쪽이 X입니다.
+    """
+    def __init__(self, window: float, min_frames: int):
+        self.window = window
+        self.min_frames = min_frames
+        self._side: dict[int, str] = {}
+        self._seen: dict[int, float] = {}
+        self._frames: dict[int, int] = {}
+        self.last_t = 0.0
+
+    def add(self, t: float, ids: np.ndarray, nose_x: np.ndarray):
+        self.last_t = t
+        for pid, right in zip(ids.tolist(), (nose_x >= 0.5).tolist()):
+            self._side[pid] = "O" if right else "X"
+            self._seen[pid] = t
+            self._frames[pid] = self._frames.get(pid, 0) + 1
+
+    def sides(self) -> dict[int, str]:
+        since = self.last_t - self.window
+        return {pid: side for pid, side in self._side.items()
+                if self._seen[pid] >= since and self._frames[pid] >= self.min_frames}
 
 class OxQuizGame:
     """
     얼굴 위치 기반 OX 퀴즈 게임 워커 클래스.
     - 정답자가 있으면 다음 라운드를 위해 대기.
     - 정답자가 없으면 게임 종료.
+    얼굴 인식은 face_tracker_worker가 'ox_quiz' 모드에서 이미 하고 있으므로,
+    여기서는 트래커가 result_bus로 올리는 TrackResult의 좌우 인원 수와 참가자 ID만 받아 씁니다.
+    탈락한 ID는 세션 동안 기억해 다음 라운드에 다시 들어와도 생존자로 세지 않습니다.
     """
-    def __init__(self, command_q: queue.Queue, result_q: queue.Queue, video_frame_q: queue.Queue):
+    def __init__(self, command_q: queue.Queue, result_q: queue.Queue, detections: LatestBus):
         self.command_q = command_q
         self.result_q = result_q
-        self.video_frame_q = video_frame_q
+        self.detections = detections
         self.stop_event = threading.Event()
+        self.eliminated: set[int] = set()
 
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        project_root = os.path.dirname(current_dir)
-        model_path = os.path.join(project_root, 'models/face_landmarker.task')
-
-        try:
-            base_options = python.BaseOptions(model_asset_path=model_path)
-            options = vision.FaceLandmarkerOptions(
-                base_options=base_options,
-                running_mode=vision.RunningMode.IMAGE,
-                num_faces=20,
-                min_face_detection_confidence=0.3, # 💡 만약 인식률이 부족하면 이 값을 0.3으로 낮춰보세요.
-                min_face_presence_confidence=0.3,
-                min_tracking_confidence=0.3,
-            )
-            self.landmarker = vision.FaceLandmarker.create_from_options(options)
-            print("✅ OX퀴즈용 얼굴 인식(FaceLandmarker) 모델 로딩 완료.")
-        except Exception as e:
-            print(f"❌ 얼굴 인식 모델 로딩 실패: {e}")
-            self.landmarker = None
-            self.stop_event.set()
-
-    def _run_one_round(self, correct_answer: str) -> dict:
+    def _run_one_round(self, correct_answer: str, is_predefined: bool = False) -> dict:
         """
         한 라운드의 퀴즈를 진행하고 결과를 반환하는 내부 로직.
-        10초간 얼굴을 인식하여 정답자 수를 계산.
+        최대 10초간 트래커의 인식 결과를 받아 정답자 수를 계산.
+        인원 수가 OX_STABLE_SECONDS 동안 변하지 않으면 일찍 끝냅니다.
+        연습 문제(is_predefined)에서는 아무도 탈락시키지 않습니다.
         """
-        if self.landmarker is None:
-            return {"status": "no_winners"}
-
-        print(f"💡 OX퀴즈 라운드 시작! 정답: '{correct_answer}'. 10초 동안 인식합니다.")
+        print(f"💡 OX퀴즈 라운드 시작! 정답: '{correct_answer}'. 최대 10초 동안 인식합니다.")
         
         COUNTING_DURATION = 10
+        round_start = time.perf_counter()
         end_time = time.time() + COUNTING_DURATION
         final_left_count, final_right_count = 0, 0
+        infer_total_ms, infer_frames, max_faces = 0.0, 0, 0
+        series = CountSeries(C.OX_COUNT_WINDOW)
+        roster = RoundRoster(C.OX_COUNT_WINDOW, C.OX_ID_MIN_FRAMES)
+        early = False
 
-        while time.time() < end_time and not self.stop_event.is_set():
-            frame = None
-            while not self.video_frame_q.empty():
-                try:
-                    frame = self.video_frame_q.get_nowait()
-                except queue.Empty:
+        with self.detections.subscribe() as results:
+            while time.time() < end_time and not self.stop_event.is_set():
+                # 가장 최근 결과 하나만 받습니다. (밀린 결과는 건너뜀)
+                item = results.wait_next(timeout=0.1)
+                if item is None:
+                    if results.closed:
+                        break  # 버스가 닫히면(종료 중) wait_next가 바로 None을 주므로 더 기다리지 않습니다.
+                    continue
+                result = item.data
+                if result.mode != 'ox_quiz':
+                    # 모드 전환 직후 트래킹 모드에서 나온 결과는 세지 않습니다.
+                    continue
+
+                final_left_count, final_right_count = series.add(item.timestamp, result.left_count, result.right_count)
+                if result.ids is not None:
+                    roster.add(item.timestamp, result.ids, result.noses[:, 0])
+                infer_total_ms += result.infer_ms
+                infer_frames += 1
+                max_faces = max(max_faces, len(result.noses))
+
+                if (item.timestamp - round_start >= C.OX_MIN_ROUND
+                        and series.stable_for(item.timestamp) >= C.OX_STABLE_SECONDS):
+                    early = True
                     break
-            
-            if frame is None:
-                time.sleep(0.05)
-                continue
-
-            # ▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼
-            # ✨ [솔루션 2 적용] 이미지 해상도를 1.5배 키워서 인식률을 높입니다.
-            h, w = frame.shape[:2]
-            upscaled_frame = cv2.resize(frame, (int(w * 1.5), int(h * 1.5)), interpolation=cv2.INTER_LINEAR)
-            
-            # 인식할 때 사용할 프레임의 높이, 너비를 다시 계산합니다.
-            h_up, w_up = upscaled_frame.shape[:2]
-            center_x = w_up // 2
-            
-            left_count, right_count = 0, 0
 
-            # 원본 frame 대신 해상도를 높인 upscaled_frame을 모델에 입력합니다.
-            mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=cv2.cvtColor(upscaled_frame, cv2.COLOR_BGR2RGB))
-            detection_result = self.landmarker.detect(mp_image)
-            # ▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲
-            
-            if detection_result.face_landmarks:
-                for face_landmarks in detection_result.face_landmarks:
-                    nose_landmark = face_landmarks[1]
-                    # 좌표 계산 시 커진 이미지의 너비(w_up)를 기준으로 사용해야 합니다.
-                    face_x_position = int(nose_landmark.x * w_up)
-                    
-                    if face_x_position < center_x:
-                        left_count += 1
-                    else:
-                        right_count += 1
-            
-            final_left_count = left_count
-            final_right_count = right_count
-            time.sleep(0.05)
+        decision_s = time.perf_counter() - round_start
+        print(f"⏱️ OX 판정: X {final_left_count}명 / O {final_right_count}명, {decision_s:.1f}초 "
+              f"({'안정되어 조기 종료' if early else '시간 만료'}, 최근 {C.OX_COUNT_WINDOW:g}초 중앙값)")
+
+        if infer_frames:
+            print(f"⏱️ OX 검출({C.OX_DETECT_MODE}): {infer_frames}프레임, 평균 {infer_total_ms / infer_frames:.1f}ms, "
+                  f"최대 {max_faces}명")
 
         # 10초 후 최종 결과 판정
         winner_count = 0
@@ -123,6 +149,18 @@ class OxQuizGame:
         elif correct_answer == "X":
             winner_count = final_left_count
 
+        # 참가자별 판정: 정답 쪽에 있고 이전에 탈락하지 않은 ID만 생존자입니다.
+        sides = roster.sides()
+        if sides and not is_predefined:
+            survivors = [pid for pid, side in sides.items() if side == correct_answer and pid not in self.eliminated]
+            returned = sorted(pid for pid in sides if pid in self.eliminated)
+            out = sorted(pid for pid, side in sides.items() if side != correct_answer and pid not in self.eliminated)
+            self.eliminated.update(out)
+            print(f"🧑‍🤝‍🧑 OX 참가자: 생존 {len(survivors)}명, 이번 탈락 {len(out)}명"
+                  + (f", 탈락 후 재입장 {len(returned)}명 (ID {returned})" if returned else ""))
+            # ID가 끊겨 새 ID로 잡힌 사람 때문에 부풀지 않도록 머릿수 중앙값을 상한으로 둡니다.
+            winner_count = min(winner_count, len(survivors))
+
         if winner_count > 0:
             return {"status": "winners_exist", "winner_count": winner_count}
         else:
@@ -133,12 +171,13 @@ class OxQuizGame:
         여러 라운드로 구성된 게임 전체를 관리하는 메인 루프.
         """
         current_answer = first_answer
+        self.eliminated.clear()
         current_is_predefined = is_predefined
         round_num = 1
 
         while not self.stop_event.is_set():
             # 1. 한 라운드 실행
-            round_result = self._run_one_round(current_answer)
+            round_result = self._run_one_round(current_answer, current_is_predefined)
             message = ""
             winner_count = 0
 
@@ -176,6 +215,9 @@ class OxQuizGame:
                 print("▶ 다음 문제의 정답과 상태를 기다립니다...")
                 next_command = self.command_q.get(timeout=60.0)
                 
+                if next_command == "STOP":
+                    self.stop_event.set()
+                    break
                 if isinstance(next_command, dict) and next_command.get("command") == "NEXT_ROUND":
                     current_answer = next_command.get("answer")
                     current_is_predefined = next_command.get("is_predefined", False)
@@ -198,37 +240,30 @@ class OxQuizGame:
 
 
     def start_worker(self):
-        """워커 스레드를 시작하고 명령을 기다립니다."""
+        """워커 스레드를 시작하고 명령을 기다립니다. 명령이 올 때까지 블록하므로 대기 중 CPU를 쓰지 않습니다."""
         print("▶ OX퀴즈(얼굴인식) 워커 대기 중...")
         while not self.stop_event.is_set():
-            try:
-                # 👈 get_nowait()으로 변경해서 기다리지 않고 바로 확인합니다.
-                command_data = self.command_q.get_nowait() 
-
-                if isinstance(command_data, dict) and command_data.get("command") == "START_OX_QUIZ":
-                    initial_answer = command_data.get("answer")
-                    is_predefined = command_data.get("is_predefined", False)
-
-                    if initial_answer in ["O", "X"]:
-                        self._run_game_rounds(initial_answer, is_predefined)
-                    else:
-                        self.result_q.put("오류: 퀴즈의 정답('O' 또는 'X')이 지정되지 않았습니다.")
-                elif command_data == "STOP":
-                    break
-            except queue.Empty:
-                # 👈 큐가 비어있으면 오류 대신 이 부분이 실행됩니다.
-                # 0.1초만 쉬고 바로 while 루프의 처음으로 돌아갑니다.
-                time.sleep(0.1) 
-                continue
+            command_data = self.command_q.get()
+
+            if isinstance(command_data, dict) and command_data.get("command") == "START_OX_QUIZ":
+                initial_answer = command_data.get("answer")
+                is_predefined = command_data.get("is_predefined", False)
+
+                if initial_answer in ["O", "X"]:
+                    self._run_game_rounds(initial_answer, is_predefined)
+                else:
+                    self.result_q.put("오류: 퀴즈의 정답('O' 또는 'X')이 지정되지 않았습니다.")
+            elif command_data == "STOP":
+                break
         
-        if self.landmarker:
-            self.landmarker.close()
         print("■ OX퀴즈(얼굴인식) 워커 정상 종료")
         
     def stop(self):
+        """종료 신호. 명령 대기 중인 get()을 깨우도록 STOP을 넣습니다."""
         self.stop_event.set()
+        self.command_q.put("STOP")
 
-def ox_quiz_game_worker(command_q: queue.Queue, result_q: queue.Queue, video_frame_q: queue.Queue):
+def ox_quiz_game_worker(command_q: queue.Queue, result_q: queue.Queue, detections: LatestBus):
     """OX 퀴즈 게임 워커를 실행하는 함수"""
-    game = OxQuizGame(command_q, result_q, video_frame_q)
+    game = OxQuizGame(command_q, result_q, detections)
     game.start_worker()
\ No newline at end of file
@@ -0,0 +1,68 @@
+# ============================================================
+#Licensed to the Apache Software Foundation (ASF) under one
+#or more contributor license agreements.  See the NOTICE file
+#distributed with this work for additional information
+#regarding copyright ownership.  The ASF licenses this file
+#to you under the Apache License, Version 2.0 (the
+#"License"); you may not use this file except in compliance
+#with the License.  You may obtain a copy of the License at
+
+#    http://www.apache.org/licenses/LICENSE-2.0
+
+#Unless required by applicable law or agreed to in writing, software
+#distributed under the License is distributed on an "AS IS" BASIS,
+#WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#See the License for the specific language governing permissions and
+#limitations under the License.
+# ============================================================
+# function/preprocess.py
+# 카메라 프레임 전처리(좌우 반전 + BGR→RGB + mp.Image 생성)를 프레임당 한 번만 하는 단계.
+# BGR 프레임은 반전 결과로 프레임마다 새로 받아(할당 1회, 추가 복사 없음) 버스에 그대로 올리므로,
+# 소비자가 오래 들고 있어도 내용이 바뀌지 않습니다. RGB 변환 버퍼만 재사용합니다.
+
+from __future__ import annotations
+import numpy as np
+from . import suppress
+
+class FramePreprocessor:
+    """
+    process(raw)는 (반전된 BGR 프레임, RGB mp.Image)를 돌려줍니다.
+    BGR 배열은 프레임마다 새 배열이라 이후 덮어써지지 않습니다. (FrameBus의 읽기 전용 약속)
+    """
+    def __init__(self, mirror: bool = True):
+        self.cv2, self.mp = suppress.import_cv2_mp()
+        self.mirror = mirror
+        # mp.Image가 만들어질 때 내용을 가져가므로 RGB 버퍼는 하나면 됩니다.
+        self._rgb: np.ndarray | None = None
+
+    def process(self, raw: np.ndarray):
+        cv2 = self.cv2
+        if self._rgb is None or self._rgb.shape != raw.shape:
+            self._rgb = np.empty(raw.shape, dtype=np.uint8)
+
+        # raw는 카메라 드라이버가 다음 프레임에 재사용할 수 있으므로 반전 없이도 새 배열로 받습니다.
+        bgr = cv2.flip(raw, 1) if self.mirror else raw.copy()
+        cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB, dst=self._rgb)
+        image = self.mp.Image(image_format=self.mp.ImageFormat.SRGB, data=self._rgb)
+        return bgr, image
+
+class RgbConverter:
+    """
+    버스 항목에 mp.Image가 없을 때(공유 메모리 링 등) 쓰는 대체 경로.
+    RGB 버퍼 하나를 재사용해 변환합니다.
+    """
+    def __init__(self):
+        self.cv2, self.mp = suppress.import_cv2_mp()
+        self._rgb: np.ndarray | None = None
+
+    def image_of(self, item):
+        if getattr(item, "image", None) is not None:
+            return item.image
+        return self.convert(item.data)
+
+    def convert(self, frame: np.ndarray):
+        """BGR 배열(잘라낸 뷰 포함)을 RGB mp.Image로 바꿉니다."""
+        if self._rgb is None or self._rgb.shape != frame.shape:
+            self._rgb = np.empty(frame.shape, dtype=np.uint8)
+        self.cv2.cvtColor(frame, self.cv2.COLOR_BGR2RGB, dst=self._rgb)
+        return self.mp.Image(image_format=self.mp.ImageFormat.SRGB, data=self._rgb)
@@ -25,27 +25,37 @@ import time
 import queue
 import threading
 import os # os 모듈 추가
+from . import config as C
+from .frame_bus import FrameBus
+from .gesture_vote import GestureVoter, PlayerSlots, VoteDecision
+from .preprocess import RgbConverter
 from mediapipe.tasks import python
 from mediapipe.tasks.python import vision
 
 # 클래스로 전체 로직을 캡슐화하여 모델 로딩을 한 번만 수행하도록 변경합니다.
 class RockPaperGame:
-    def __init__(self, command_q: queue.Queue, result_q: queue.Queue, video_frame_q: queue.Queue):
+    def __init__(self, command_q: queue.Queue, result_q: queue.Queue, frame_bus: FrameBus):
         self.command_q = command_q
         self.result_q = result_q
-        self.video_frame_q = video_frame_q
+        self.frame_bus = frame_bus  # FrameBus 또는 RingFrameSource (별도 프로세스일 때)
         self.stop_event = threading.Event()
+        self.rgb = RgbConverter()  # 트래커가 만든 mp.Image를 재사용하고, 없을 때만 변환
 
         # 모델 파일 경로 설정 (상대 경로 문제 해결)
         base_dir = os.path.dirname(os.path.abspath(__file__))
         model_path = os.path.join(base_dir, 'gesture_recognizer.task')
 
         # 제스처 인식기(GestureRecognizer) 생성
+        # VIDEO 모드: 손을 프레임 사이에서 추적하므로 매 프레임 손바닥 검출을 처음부터 하지 않습니다.
+        # RPS_MAX_PLAYERS > 1이면 한 프레임에서 여러 손을 함께 인식해 여러 명이 한 판에 참여합니다.
+        self.max_players = max(1, C.RPS_MAX_PLAYERS)
         options = vision.GestureRecognizerOptions(
             base_options=python.BaseOptions(model_asset_path=model_path),
-            running_mode=vision.RunningMode.IMAGE
+            running_mode=vision.RunningMode.VIDEO,
+            num_hands=self.max_players
         )
         self.recognizer = vision.GestureRecognizer.create_from_options(options)
+        self._last_ts = -1  # VIDEO 모드는 인식기 수명 내내 단조 증가하는 timestamp가 필요합니다.
         print("✅ 가위바위보 제스처 모델 미리 로딩 완료.")
 
         # 모델 예열(Warm-up)을 위해 가짜 이미지로 한 번 실행합니다.
@@ -53,7 +63,7 @@ class RockPaperGame:
             print("▶ 가위바위보 모델 예열 중...")
             dummy_image = np.zeros((100, 100, 3), dtype=np.uint8)
             dummy_mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=dummy_image)
-            self.recognizer.recognize(dummy_mp_image)
+            self._recognize(dummy_mp_image, time.perf_counter())
             print("✅ 가위바위보 모델 예열 완료.")
         except Exception as e:
             print(f"⚠️ 모델 예열 중 오류 발생: {e}")
@@ -62,94 +72,248 @@ class RockPaperGame:
         self.MIN_CONFIDENCE_SCORE = 0.7
         self.KOREAN_CHOICES = {"Rock": "바위", "Paper": "보", "Scissors": "가위"}
 
+    def _recognize(self, mp_image, t_capture: float):
+        ts = max(int(t_capture * 1000), self._last_ts + 1)
+        self._last_ts = ts
+        return self.recognizer.recognize_for_video(mp_image, ts)
+
+    @staticmethod
+    def _hand_roi(hand_landmarks, h: int, w: int, origin=(0, 0, 1.0, 1.0)):
+        """
+        인식된 손 랜드마크로 다음 프레임에서 잘라낼 영역(픽셀 x0, y0, x1, y1)을 계산합니다.
+        origin은 이번 입력이 전체 화면의 어느 부분이었는지(정규화 x0, y0, 너비, 높이)입니다.
+        영역은 화면과 같은 가로세로 비율이라 전체 화면 크기로 늘려도 손 모양이 찌그러지지 않습니다.
+        """
+        ox, oy, ow, oh = origin
+        xs = np.array([p.x for p in hand_landmarks], dtype=np.float32) * ow + ox
+        ys = np.array([p.y for p in hand_landmarks], dtype=np.float32) * oh + oy
+        x0, x1, y0, y1 = xs.min(), xs.max(), ys.min(), ys.max()
+        # 정규화 좌표에서 가로/세로 반폭이 같으면 화면과 비율이 같습니다.
+        m = min(0.5, max((x1 - x0) * (0.5 + C.RPS_ROI_MARGIN), (y1 - y0) * (0.5 + C.RPS_ROI_MARGIN),
+                         C.RPS_ROI_MIN_SIZE / 2))
+        # 화면 밖으로 나가면 자르지 않고 영역을 안쪽으로 밀어 비율을 유지합니다.
+        cx = min(max((x0 + x1) / 2, m), 1.0 - m)
+        cy = min(max((y0 + y1) / 2, m), 1.0 - m)
+        return int((cx - m) * w), int((cy - m) * h), int((cx + m) * w), int((cy + m) * h)
+
+    def _wait_for_shoot(self, since: float) -> float | None:
+        """
+        PTT가 "보!"를 다 말한 뒤 보내는 {"command": "SHOOT", "t": ...}를 기다려 그 시각을 돌려줍니다.
+        since보다 오래된 SHOOT(지난 판의 늦은 신호)는 버리고, 시간 초과면 None.
+        STOP이 오면 종료 신호를 세우고, 그 밖의 명령은 기다림이 끝난 뒤 큐에 되돌려 놓습니다.
+        """
+        deferred = []
+        deadline = time.perf_counter() + C.RPS_SHOOT_WAIT
+        try:
+            while not self.stop_event.is_set():
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    return None
+                try:
+                    command = self.command_q.get(timeout=min(remaining, 1.0))
+                except queue.Empty:
+                    continue
+                if isinstance(command, dict) and command.get("command") == "SHOOT":
+                    if command.get("t", 0.0) >= since:
+                        return command["t"]
+                    print("ℹ️ 지난 판의 SHOOT 신호를 버립니다.")
+                elif command == "STOP":
+                    print("▶ SHOOT 대기 중 STOP 수신 → 게임 중단")
+                    self.stop_event.set()
+                    deferred.append(command)  # start_worker도 STOP을 보고 빠져나가게 남겨 둡니다.
+                else:
+                    deferred.append(command)
+            return None
+        finally:
+            for command in deferred:
+                self.command_q.put(command)
+
     def _run_game_logic(self):
         """실제 게임 한 판을 실행하는 로직"""
-        print("💡 게임 시작 신호 받음. 제스처를 인식합니다.")
+        print("💡 게임 시작 신호 받음. \"보!\" 신호를 기다립니다.")
 
-        #--- 게임 시작 전 큐를 비웁니다. ---
-        while not self.video_frame_q.empty():
-            try:
-                self.video_frame_q.get_nowait()
-            except queue.Empty:
-                break
+        round_start = time.perf_counter()
+        t_shoot = self._wait_for_shoot(round_start)
+        if self.stop_event.is_set():
+            return
+        if t_shoot is None:
+            # 신호가 안 오면 예전처럼 지금부터 인식합니다.
+            print("⚠️ SHOOT 신호 없음 → 바로 인식 시작")
+            t_shoot = time.perf_counter()
+        window_start = t_shoot - C.RPS_SHOOT_LEAD
+        window_end = t_shoot + C.RPS_SHOOT_WINDOW
+        skipped = 0
 
-        best_gesture = "None"
-        max_confidence_score = 0.0
-        recognition_started = False
-        start_time = 0
         end_time = time.time() + 20 # 전체 제한 시간 20초
+        decide_deadline = None      # 첫 인식 후 3초 안에 결정이 안 나면 그때까지의 1등
+        slots = PlayerSlots(self.max_players)
+        voters: dict[int, GestureVoter] = {}
+        decisions: dict[int, VoteDecision] = {}
+
+        # 손 영역 자르기는 한 사람만 할 때만 씁니다. (여러 명이면 전체 화면이 필요)
+        use_roi = C.RPS_HAND_ROI and self.max_players == 1
+        roi = None  # 잘라서 볼 손 주변 영역 (픽셀 x0, y0, x1, y1)
+        roi_buf = None  # 자른 영역을 전체 화면 크기로 늘려 담는 버퍼
+        lost = 0
+        frames_seen = 0
+
+        # 구독한 뒤에 올라온 프레임만 받으므로 예전처럼 시작 전에 큐를 비울 필요가 없습니다.
+        with self.frame_bus.subscribe() as frames:
+            while time.time() < end_time and not self.stop_event.is_set():
+                item = frames.wait_next(timeout=0.1)
+                if item is None:
+                    if frames.closed or time.perf_counter() > window_end:
+                        break  # 버스가 닫히면(종료 중) wait_next가 바로 None을 주므로 더 기다리지 않습니다.
+                    continue
+                if item.timestamp < window_start:
+                    skipped += 1
+                    continue
+                if item.timestamp > window_end:
+                    break  # "보!" 직후 창이 끝났습니다.
+                frames_seen += 1
+                h, w = item.data.shape[:2]
+                if roi is not None:
+                    # VIDEO 모드 인식기는 입력 크기가 바뀌면 추적이 깨지므로,
+                    # 자른 영역도 전체 화면과 같은 크기로 늘려서 넣습니다.
+                    x0, y0, x1, y1 = roi
+                    if roi_buf is None or roi_buf.shape != item.data.shape:
+                        roi_buf = np.empty_like(item.data)
+                    cv2.resize(item.data[y0:y1, x0:x1], (w, h), dst=roi_buf, interpolation=cv2.INTER_LINEAR)
+                    mp_image = self.rgb.convert(roi_buf)
+                    origin = (x0 / w, y0 / h, (x1 - x0) / w, (y1 - y0) / h)
+                else:
+                    mp_image = self.rgb.image_of(item)
+                    origin = (0.0, 0.0, 1.0, 1.0)
+                # 한 번의 호출로 최대 max_players개의 손을 함께 인식합니다.
+                recognition_result = self._recognize(mp_image, item.timestamp)
+
+                if use_roi:
+                    if recognition_result.hand_landmarks:
+                        lost = 0
+                        if roi is None:
+                            # 영역은 한 번 정하면 고정합니다. 매 프레임 옮기면 VIDEO 모드 추적 좌표가 흔들립니다.
+                            roi = self._hand_roi(recognition_result.hand_landmarks[0], h, w, origin)
+                    elif roi is not None:
+                        lost += 1
+                        if lost >= C.RPS_ROI_LOST_FRAMES:
+                            roi = None  # 손을 놓치면 다시 전체 화면에서 찾습니다.
 
-        while time.time() < end_time and not self.stop_event.is_set():
-            try:
-                frame = self.video_frame_q.get(timeout=0.1)
-                mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
-                recognition_result = self.recognizer.recognize(mp_image)
-                
                 if recognition_result.gestures:
-                    top_gesture = recognition_result.gestures[0][0]
-                    gesture_name = top_gesture.category_name
-                    confidence_score = top_gesture.score
-                    
-                    if self.MIN_CONFIDENCE_SCORE <= confidence_score and gesture_name in ["Victory", "Closed_Fist", "Open_Palm"]:
-                        if not recognition_started:
-                            recognition_started = True
-                            start_time = time.time()
-                        
-                        if confidence_score > max_confidence_score:
-                            best_gesture = gesture_name
-                            max_confidence_score = confidence_score
-                            print(f"[{time.strftime('%H:%M:%S')}] Gesture: {gesture_name}, Score: {confidence_score:.2f}")
-                        else:
-                            print(f"[{time.strftime('%H:%M:%S')}] Gesture: None")
-                                
-                if recognition_started and time.time() - start_time >= 3:
+                    # 손목(0번 랜드마크) x좌표로 왼쪽→오른쪽 플레이어 슬롯에 붙입니다.
+                    xs = np.array([hand[0].x for hand in recognition_result.hand_landmarks], dtype=np.float32)
+                    xs = xs * origin[2] + origin[0]
+                    for slot, gestures in zip(slots.assign(xs), recognition_result.gestures):
+                        if slot is None or slot in decisions:
+                            continue
+                        top_gesture = gestures[0]
+                        gesture_name = top_gesture.category_name
+                        confidence_score = top_gesture.score
+
+                        if self.MIN_CONFIDENCE_SCORE <= confidence_score and gesture_name in ["Victory", "Closed_Fist", "Open_Palm"]:
+                            if decide_deadline is None:
+                                decide_deadline = time.perf_counter() + 3
+                            print(f"[{time.strftime('%H:%M:%S')}] Player {slot}: {gesture_name}, Score: {confidence_score:.2f}")
+                            voter = voters.setdefault(slot, GestureVoter(C.RPS_VOTE_WINDOW, C.RPS_VOTE_MASS, C.RPS_VOTE_MARGIN))
+                            decision = voter.add(gesture_name, confidence_score, item.timestamp)
+                            if decision:
+                                decisions[slot] = decision
+
+                    if len(decisions) == len(slots.centers):
+                        break  # 화면에 나온 손이 모두 결정됐습니다. (비어 있는 자리는 기다리지 않음)
+
+                if decide_deadline is not None and time.perf_counter() >= decide_deadline:
                     break
-            except queue.Empty:
-                continue
 
-        if best_gesture == "None":
+        # 일찍 결정되지 않은 플레이어는 창 안에서 점수 합이 가장 큰 제스처로 정합니다.
+        now = time.perf_counter()
+        for slot, voter in voters.items():
+            if slot not in decisions:
+                best = voter.best(now)
+                if best:
+                    decisions[slot] = best
+
+        print(f"ℹ️ 가위바위보 인식: {frames_seen}프레임 평가, 창 밖 {skipped}프레임 건너뜀"
+              + (" (손 영역 추적)" if use_roi else ""))
+
+        if not decisions:
             self.result_q.put("아고! 실수로 눈을 감아 인식을 못했어요. 죄송해요.")
             return
 
         user_choice_map = {"Victory": "Scissors", "Closed_Fist": "Rock", "Open_Palm": "Paper"}
-        user_choice = user_choice_map.get(best_gesture, "")
         computer_choice = random.choice(["Rock", "Paper", "Scissors"])
-        
-        user_choice_kr = self.KOREAN_CHOICES.get(user_choice, "")
         computer_choice_kr = self.KOREAN_CHOICES.get(computer_choice, "")
 
-        if user_choice == computer_choice:
-            result_text = f"저도 {user_choice_kr}를 냈어요. 비겼네요!"
-        elif (user_choice == "Rock" and computer_choice == "Scissors") or \
-             (user_choice == "Paper" and computer_choice == "Rock") or \
-             (user_choice == "Scissors" and computer_choice == "Paper"):
-            print("사용자: " +user_choice)
-            result_text = f"제가 {computer_choice_kr}를 냈네요. 당신이 이겼어요!"
+        players = [s for s in slots.order() if s in decisions]
+        choices = []
+        for number, slot in enumerate(players, start=1):
+            decision = decisions[slot]
+            print(f"✅ 플레이어 {number} 결정: {decision.label} (질량 {decision.mass:.2f}, 차이 {decision.margin:.2f}, "
+                  f"표 {decision.votes}개, {'조기 결정' if decision.early else '시간 만료'}) "
+                  f"- 첫 인식 후 {decision.latency:.2f}s / 시작 후 {now - round_start:.2f}s")
+            choices.append(user_choice_map.get(decision.label, ""))
+
+        if len(choices) == 1:
+            result_text = self._single_result(choices[0], computer_choice)
         else:
-            print("사용자: " +user_choice)
-            result_text = f"제가 {computer_choice_kr}를 냈어요. 제가 이겼네요!"
-        
+            result_text = self._group_result(choices, computer_choice)
         self.result_q.put(result_text)
 
+    @staticmethod
+    def _beats(a: str, b: str) -> bool:
+        return (a, b) in (("Rock", "Scissors"), ("Paper", "Rock"), ("Scissors", "Paper"))
+
+    def _single_result(self, user_choice: str, computer_choice: str) -> str:
+        user_choice_kr = self.KOREAN_CHOICES.get(user_choice, "")
+        computer_choice_kr = self.KOREAN_CHOICES.get(computer_choice, "")
+        print("사용자: " + user_choice)
+        if user_choice == computer_choice:
+            return f"저도 {user_choice_kr}를 냈어요. 비겼네요!"
+        if self._beats(user_choice, computer_choice):
+            return f"제가 {computer_choice_kr}를 냈네요. 당신이 이겼어요!"
+        return f"제가 {computer_choice_kr}를 냈어요. 제가 이겼네요!"
+
+    def _group_result(self, choices: list[str], computer_choice: str) -> str:
+        """
+        여러 명의 결과를 한 문장으로 만듭니다. 플레이어마다 승/무/패를 알려 주고,
+        PTT가 문구로 분기하므로 끝맺음은 정해진 표현을 씁니다.
+        - 모두 비김: "비겼네요" / 모두 이김: "여러분이 이겼어요" / 모두 짐: "제가 이겼네요"
+        - 결과가 섞이면: "승부가 갈렸네요"
+        """
+        computer_choice_kr = self.KOREAN_CHOICES.get(computer_choice, "")
+        outcomes = ["무" if c == computer_choice else "승" if self._beats(c, computer_choice) else "패" for c in choices]
+        wins, draws, losses = outcomes.count("승"), outcomes.count("무"), outcomes.count("패")
+        said = {"승": "이김", "무": "비김", "패": "짐"}
+        picks = ", ".join(f"{i}번 {self.KOREAN_CHOICES.get(c, '')} {said[o]}"
+                          for i, (c, o) in enumerate(zip(choices, outcomes), start=1))
+        print(f"사용자 {len(choices)}명: {picks} / 로봇: {computer_choice} → 승 {wins}, 무 {draws}, 패 {losses}")
+
+        summary = f"{len(choices)}명이 함께 했어요. 저는 {computer_choice_kr}를 냈어요. {picks}."
+        if draws == len(choices):
+            return f"{summary} 모두 비겼네요!"
+        if wins == len(choices):
+            return f"{summary} 여러분이 이겼어요!"
+        if losses == len(choices):
+            return f"{summary} 제가 이겼네요!"
+        return f"{summary} 이긴 사람 {wins}명, 비긴 사람 {draws}명, 진 사람 {losses}명. 승부가 갈렸네요!"
+
     def start_worker(self):
-        """워커 스레드를 시작하고 명령을 기다립니다."""
+        """워커 스레드를 시작하고 명령을 기다립니다. 명령이 올 때까지 블록하므로 대기 중 CPU를 쓰지 않습니다."""
         print("▶ 가위바위보 워커 대기 중...")
         while not self.stop_event.is_set():
-            try:
-                command = self.command_q.get(timeout=1.0)
-                if command == "START_GAME":
-                    self._run_game_logic()
-                elif command == "STOP":
-                    break
-            except queue.Empty:
-                continue
+            command = self.command_q.get()
+            if command == "START_GAME":
+                self._run_game_logic()
+            elif command == "STOP":
+                break
         
         self.recognizer.close()
         print("■ 가위바위보 워커 정상 종료")
         
     def stop(self):
+        """종료 신호. 명령 대기 중인 get()을 깨우도록 STOP을 넣습니다."""
         self.stop_event.set()
+        self.command_q.put("STOP")
 
-def rock_paper_game_worker(command_q: queue.Queue, result_q: queue.Queue, video_frame_q: queue.Queue):
-    game = RockPaperGame(command_q, result_q, video_frame_q)
+def rock_paper_game_worker(command_q: queue.Queue, result_q: queue.Queue, frame_bus: FrameBus):
+    game = RockPaperGame(command_q, result_q, frame_bus)
     game.start_worker()
@@ -0,0 +1,267 @@
+# ============================================================
+#Licensed to the Apache Software Foundation (ASF) under one
+#or more contributor license agreements.  See the NOTICE file
+#distributed with this work for additional information
+#regarding copyright ownership.  The ASF licenses this file
+#to you under the Apache License, Version 2.0 (the
+#"License"); you may not use this file except in compliance
+#with the License.  You may obtain a copy of the License at
+
+#    http://www.apache.org/licenses/LICENSE-2.0
+
+#Unless required by applicable law or agreed to in writing, software
+#distributed under the License is distributed on an "AS IS" BASIS,
+#WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#See the License for the specific language governing permissions and
+#limitations under the License.
+# ============================================================
+# function/shm_ring.py
+# multiprocessing.shared_memory 위의 고정 크기 프레임 링 버퍼.
+# 트래커(launcher 프로세스)가 쓰고, VISION_PROCESSES=1일 때 별도 프로세스로 뜬 가위바위보 워커가 읽습니다.
+# 복사 없는 전달이 아닙니다: 브리지 스레드가 프레임마다 한 번 링에 복사하고,
+# 워커 쪽 구독(RingSubscription)이 읽을 때마다 슬롯을 한 번 더 복사한 뒤 seqlock으로 검증해 찢어진 프레임을 걸러냅니다.
+#
+# 메모리 배치 (모두 8바이트 정렬)
+#   header : int64[16]  = [MAGIC, n_slots, slot_bytes, latest_seq, 예비 x4, 읽기 요청 플래그 x8]
+#   meta   : int64[n_slots, 6] = [seqlock, seq, h, w, c, 예비]   (seqlock: 홀수면 쓰는 중)
+#   stamp  : float64[n_slots]  = 촬영 시각 (time.perf_counter 초)
+#   data   : n_slots * slot_bytes
+
+from __future__ import annotations
+import sys
+import time
+import threading
+import numpy as np
+from multiprocessing import shared_memory
+from .frame_bus import BusItem, FrameBus
+
+MAGIC = 0x4D4F5449  # "MOTI"
+MAX_READERS = 8
+_HEADER_INTS = 8 + MAX_READERS
+_META_COLS = 6
+_H_MAGIC, _H_SLOTS, _H_SLOT_BYTES, _H_LATEST = 0, 1, 2, 3
+
+def _layout(n_slots: int, slot_bytes: int):
+    header = _HEADER_INTS * 8
+    meta = n_slots * _META_COLS * 8
+    stamp = n_slots * 8
+    data_offset = (header + meta + stamp + 63) // 64 * 64
+    return header, meta, data_offset, data_offset + n_slots * slot_bytes
+
+class SharedFrameRing:
+    """
+    고정 크기 슬롯 n개짜리 프레임 링. 쓰는 쪽은 하나(트래커)만 있어야 합니다.
+    read_latest()가 돌려주는 배열은 공유 메모리를 직접 가리키므로,
+    대략 n_slots 프레임 안에 다 쓰거나 still_valid()로 덮어쓰기 여부를 확인하세요.
+    """
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        self.shm = shm
+        self.owner = owner
+        buf = shm.buf
+        self._header = np.ndarray((_HEADER_INTS,), dtype=np.int64, buffer=buf, offset=0)
+        if owner is False and self._header[_H_MAGIC] != MAGIC:
+            raise RuntimeError(f"프레임 링 형식이 아닙니다: {shm.name}")
+        self.n_slots = int(self._header[_H_SLOTS])
+        self.slot_bytes = int(self._header[_H_SLOT_BYTES])
+        header, meta, data_offset, _ = _layout(self.n_slots, self.slot_bytes)
+        self._meta = np.ndarray((self.n_slots, _META_COLS), dtype=np.int64, buffer=buf, offset=header)
+        self._stamp = np.ndarray((self.n_slots,), dtype=np.float64, buffer=buf, offset=header + meta)
+        self._data = np.ndarray((self.n_slots, self.slot_bytes), dtype=np.uint8, buffer=buf, offset=data_offset)
+        self._readers = self._header[8:8 + MAX_READERS]
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @classmethod
+    def create(cls, n_slots: int = 8, slot_bytes: int = 1280 * 720 * 3, name: str | None = None) -> "SharedFrameRing":
+        *_, total = _layout(n_slots, slot_bytes)
+        shm = shared_memory.SharedMemory(name=name, create=True, size=total)
+        header = np.ndarray((_HEADER_INTS,), dtype=np.int64, buffer=shm.buf, offset=0)
+        header[:] = 0
+        header[_H_SLOTS], header[_H_SLOT_BYTES] = n_slots, slot_bytes
+        ring = cls(shm, owner=True)
+        ring._meta[:] = 0
+        header[_H_MAGIC] = MAGIC  # 나머지를 다 채운 뒤에 표시
+        return ring
+
+    @classmethod
+    def attach(cls, name: str, timeout: float = 10.0) -> "SharedFrameRing":
+        deadline = time.time() + timeout
+        # 3.13+에서는 읽는 쪽을 resource_tracker에 등록하지 않습니다.
+        # (그 이전 버전은 multiprocessing 자식이 부모의 tracker를 공유하므로 등록이 중복되어도 무해합니다.)
+        kwargs = {"track": False} if sys.version_info >= (3, 13) else {}
+        while True:
+            try:
+                shm = shared_memory.SharedMemory(name=name, **kwargs)
+                break
+            except FileNotFoundError:
+                if time.time() > deadline:
+                    raise
+                time.sleep(0.1)
+        return cls(shm, owner=False)
+
+    # ---- 쓰는 쪽 ----
+    def write(self, frame: np.ndarray, timestamp: float) -> int:
+        if frame.nbytes > self.slot_bytes:
+            raise ValueError(f"프레임({frame.shape})이 슬롯 크기({self.slot_bytes}B)보다 큽니다.")
+        seq = int(self._header[_H_LATEST]) + 1
+        i = seq % self.n_slots
+        meta = self._meta[i]
+        meta[0] += 1                       # 홀수: 쓰는 중
+        h, w = frame.shape[:2]
+        c = frame.shape[2] if frame.ndim == 3 else 1
+        self._data[i, :frame.nbytes] = frame.reshape(-1)
+        meta[1], meta[2], meta[3], meta[4] = seq, h, w, c
+        self._stamp[i] = timestamp
+        meta[0] += 1                       # 짝수: 완료
+        self._header[_H_LATEST] = seq
+        return seq
+
+    def has_readers(self) -> bool:
+        return bool(self._readers.any())
+
+    # ---- 읽는 쪽 ----
+    def set_demand(self, reader_id: int, active: bool):
+        """읽는 프로세스가 프레임이 필요할 때만 켭니다. 모두 꺼져 있으면 쓰는 쪽이 복사를 건너뜁니다."""
+        self._readers[reader_id] = 1 if active else 0
+
+    def latest_seq(self) -> int:
+        return int(self._header[_H_LATEST])
+
+    def read_latest(self, after_seq: int = 0):
+        """after_seq보다 새 프레임이 있으면 (seq, timestamp, 읽기 전용 뷰, seqlock)을, 없으면 None."""
+        for _ in range(3):
+            seq = int(self._header[_H_LATEST])
+            if seq <= after_seq:
+                return None
+            i = seq % self.n_slots
+            meta = self._meta[i]
+            lock = int(meta[0])
+            if lock & 1:
+                continue                   # 쓰는 중이면 다시 시도
+            if int(meta[1]) != seq:
+                continue
+            h, w, c = int(meta[2]), int(meta[3]), int(meta[4])
+            timestamp = float(self._stamp[i])
+            view = self._data[i, :h * w * c].reshape((h, w, c) if c > 1 else (h, w))
+            if int(meta[0]) != lock:
+                continue                   # 읽는 사이 덮어써졌으면 다시 시도
+            view.flags.writeable = False
+            return seq, timestamp, view, (i, lock)
+        return None
+
+    def still_valid(self, token) -> bool:
+        i, lock = token
+        return int(self._meta[i, 0]) == lock
+
+    def close(self):
+        for arr in ("_header", "_meta", "_stamp", "_data", "_readers"):
+            setattr(self, arr, None)
+        try: self.shm.close()
+        except Exception: pass
+        if self.owner:
+            try: self.shm.unlink()
+            except Exception: pass
+
+class RingSubscription:
+    """
+    FrameBus의 Subscription과 같은 방식(wait_next)으로 링을 읽습니다.
+    FrameBus와 달리 읽은 프레임마다 전체 프레임 크기만큼 복사합니다. (받은 프레임은 검증된 복사본)
+    """
+    POLL_INTERVAL = 0.003
+
+    def __init__(self, ring: SharedFrameRing, reader_id: int):
+        self.ring = ring
+        self.reader_id = reader_id
+        self._last_seq = ring.latest_seq()
+        ring.set_demand(reader_id, True)
+
+    def wait_next(self, timeout: float | None = None) -> BusItem | None:
+        """
+        새 프레임을 슬롯에서 복사해 돌려줍니다.
+        복사를 마친 뒤 seqlock을 다시 확인하므로, 복사 도중 쓰는 쪽이 슬롯을 덮어쓴 프레임은 버리고 다시 읽습니다.
+        (돌려준 배열은 이 구독자 것이라 링이 한 바퀴 돌아도 바뀌지 않습니다.)
+        """
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        while True:
+            got = self.ring.read_latest(self._last_seq)
+            if got is not None:
+                seq, timestamp, view, token = got
+                frame = view.copy()
+                if self.ring.still_valid(token):
+                    self._last_seq = seq
+                    frame.flags.writeable = False
+                    return BusItem(seq, timestamp, frame)
+                continue                   # 찢어진 프레임: 바로 최신 것을 다시 읽음
+            if deadline is not None and time.perf_counter() >= deadline:
+                return None
+            time.sleep(self.POLL_INTERVAL)
+
+    @property
+    def closed(self) -> bool:
+        """링이 닫혔는지 (Subscription.closed와 같은 뜻)."""
+        return self.ring is None or self.ring._header is None
+
+    def close(self):
+        if self.ring is not None and self.ring._readers is not None:
+            self.ring.set_demand(self.reader_id, False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class RingFrameSource:
+    """
+    다른 프로세스로 넘길 수 있는(pickle 가능한) 프레임 소스.
+    자식 프로세스에서 처음 subscribe()할 때 링에 붙습니다. FrameBus 대신 워커에 넘기면 됩니다.
+    """
+    def __init__(self, name: str, reader_id: int):
+        if not 0 <= reader_id < MAX_READERS:
+            raise ValueError(f"reader_id는 0~{MAX_READERS - 1} 사이여야 합니다.")
+        self.name = name
+        self.reader_id = reader_id
+        self._ring: SharedFrameRing | None = None
+
+    def __getstate__(self):
+        return {"name": self.name, "reader_id": self.reader_id, "_ring": None}
+
+    def subscribe(self) -> RingSubscription:
+        if self._ring is None:
+            self._ring = SharedFrameRing.attach(self.name)
+        return RingSubscription(self._ring, self.reader_id)
+
+    def close(self):
+        if self._ring is not None:
+            self._ring.close()
+            self._ring = None
+
+def ring_bridge_worker(frame_bus: FrameBus, ring: SharedFrameRing, stop_event: threading.Event):
+    """
+    FrameBus → 공유 메모리 링 복사 스레드.
+    읽기 요청이 있는 동안에만 버스를 구독하므로 게임이 쉬는 동안에는 복사가 일어나지 않습니다.
+    """
+    print(f"▶ 프레임 링 브리지 시작 (shm={ring.name}, slots={ring.n_slots})")
+    warned = False
+    try:
+        while not stop_event.is_set() and not frame_bus.closed:
+            if not ring.has_readers():
+                stop_event.wait(0.02)
+                continue
+            with frame_bus.subscribe() as frames:
+                while ring.has_readers() and not stop_event.is_set():
+                    item = frames.wait_next(timeout=0.1)
+                    if item is None:
+                        if frames.closed:
+                            break  # 버스가 닫히면 wait_next가 바로 None을 주므로 돌지 않고 나갑니다.
+                        continue
+                    try:
+                        ring.write(item.data, item.timestamp)
+                    except ValueError as e:
+                        if not warned:
+                            print(f"⚠️ 프레임 링 쓰기 실패: {e}")
+                            warned = True
+    finally:
+        print("■ 프레임 링 브리지 종료")
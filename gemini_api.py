@@ -21,6 +21,7 @@ from __future__ import annotations
 
 import os
 import io
+import re
 import sys
 import json
 import base64
@@ -31,6 +32,7 @@ import platform
 import random
 import time
 from dataclasses import dataclass
+from collections import deque
 from datetime import datetime
 from typing import Optional, Callable
 import multiprocessing
@@ -51,6 +53,9 @@ from pynput import keyboard
 import google.generativeai as genai
 import requests
 
+from intent_fastpath import IntentFastPath
+from quiz_bank import QuizBank
+
 IS_WINDOWS = (platform.system() == "Windows")
 
 def _get_env(name: str, default: str | None = None) -> str | None:
@@ -117,6 +122,38 @@ TTS_OUTPUT_DEVICE = _get_env("TTS_OUTPUT_DEVICE", "")
 GREETING_TEXT = _get_env("GREETING_TEXT", "안녕하세요! 모티입니다.")
 FAREWELL_TEXT = _get_env("FAREWELL_TEXT", "도움이 되었길 바라요. 언제든 다시 불러주세요.")
 ENABLE_GREETING = _get_env("ENABLE_GREETING", "1") not in ("0", "false", "False")
+# 1이면 음성 한 번의 호출로 전사·의도·답변·표정을 함께 받습니다. 실패하면 전사 → 라우터 → 대화 순서로 폴백.
+FUSED_TURN = _get_env("FUSED_TURN", "1") not in ("0", "false", "False")
+RECENT_TURNS = int(_get_env("RECENT_TURNS", "6"))  # 통합 호출에 함께 보내는 최근 대화 수
+INTENTS = ("dance", "stop", "game", "chat", "joke", "ox_quiz")
+EMOTIONS = ("HAPPY", "SURPRISED", "SAD", "ANGRY", "TENDER", "THINKING", "NEUTRAL")
+INTENT_RULES = (
+    "dance=사용자가 실제로 춤을 '시작하라고' 명령/요청/승인. "
+    "game=가위바위보 게임을 시작하자는 요청. "
+    "ox_quiz=얼굴 인식 OX 퀴즈 게임을 시작하자는 요청. "
+    "joke=개그나 농담을 해달라는 명확한 요청. "
+    "stop=춤을 '멈추라'는 명령/요청/승인. "
+    "chat=일반 대화(질문/잡담/설명/감정표현/춤에 대한 견해·가정적 질문 포함). "
+    "부정/금지/거절 표현(예:'춤 추지 마','춤은 안돼','그만두지 말고 계속')은 정확히 반영하라. "
+)
+TURN_INSTRUCTION = (
+    SYSTEM_INSTRUCTION + "\n\n"
+    "지금부터 사용자의 한국어 음성을 듣고 한 번에 처리해."
+    " 전사 규칙: (1) 사람 발화만, (2) 배경음/중얼거림/비언어음은 삭제,"
+    " (3) 종결어미·띄어쓰기·문장부호를 자연스럽게, (4) '춤', '그만' 같은 지시어는 그대로 보존."
+    " 사람 말이 없으면 transcript는 빈 문자열."
+    " 의도 분류: " + INTENT_RULES +
+    "오직 아래 JSON만 출력:\n"
+    '{ "transcript": "<정확한 최종 전사>", "intent": "dance|stop|game|ox_quiz|chat|joke", '
+    '"normalized_text": "<의미만 보존한 간결한 문장>", '
+    '"emotion": "HAPPY|SURPRISED|SAD|ANGRY|TENDER|THINKING|NEUTRAL 중 reply에 어울리는 표정 하나", '
+    '"reply": "<intent가 chat일 때 위 성격대로 1~2문장 답변. 그 외에는 빈 문자열>" }'
+)
+# 1이면 확실한 짧은 명령("춤 춰줘", "그만")은 로컬 분류기로 바로 처리하고 애매한 문장만 LLM에 묻습니다.
+INTENT_FASTPATH = _get_env("INTENT_FASTPATH", "1") not in ("0", "false", "False")
+# 1이면 답변을 스트리밍으로 받아 문장이 완성되는 대로 TTS/자막에 넘깁니다.
+STREAM_REPLY = _get_env("STREAM_REPLY", "1") not in ("0", "false", "False")
+STREAM_MIN_CHARS = int(_get_env("STREAM_MIN_CHARS", "8"))  # 이보다 짧은 문장은 다음 문장과 합쳐 말함
 
 def _extract_text(resp) -> str:
     t = getattr(resp, "text", None)
@@ -137,12 +174,177 @@ def _extract_text(resp) -> str:
     try: return str(resp).strip()
     except Exception: return ""
 
+def _chunk_text(chunk) -> str:
+    """스트리밍 조각의 텍스트. 텍스트가 없는 조각(종료 신호 등)은 빈 문자열."""
+    try: return chunk.text or ""
+    except Exception: return ""
+
+# 문장 끝: 마침표/물음표/느낌표/말줄임/물결(+닫는 따옴표·괄호) 뒤에 공백이 올 때, 또는 줄바꿈.
+# 뒤에 공백이 와야 끝으로 보므로 '3.5' 같은 숫자나 아직 덜 온 조각에서는 자르지 않습니다.
+_SENTENCE_END = re.compile(r'[.!?…~。]+["\'”’)\]]*(?=\s)|\n+')
+
+class SentenceSplitter:
+    """스트리밍으로 들어오는 한국어 텍스트를 완성된 문장 단위로 잘라 냅니다."""
+    def __init__(self, min_chars: int = STREAM_MIN_CHARS):
+        self.min_chars = min_chars
+        self.buf = ""
+
+    def feed(self, text: str) -> list[str]:
+        self.buf += text
+        out, start = [], 0
+        for m in _SENTENCE_END.finditer(self.buf):
+            piece = self.buf[start:m.end()].strip()
+            if len(piece) < self.min_chars:
+                continue  # "네!" 같이 짧은 문장은 다음 문장과 합쳐서 한 번에 말합니다.
+            out.append(piece)
+            start = m.end()
+        self.buf = self.buf[start:]
+        return out
+
+    def flush(self) -> str:
+        rest, self.buf = self.buf.strip(), ""
+        return rest
+
+class JsonStringField:
+    """
+    스트리밍 중인 JSON 텍스트에서 문자열 필드 하나의 값을 도착하는 대로 꺼냅니다.
+    feed()는 이번 조각으로 새로 확정된 글자만 돌려주고, 닫는 따옴표를 만나면 done이 됩니다.
+    """
+    _ESCAPES = {"n": "\n", "t": "\t", "r": "", "b": "", "f": ""}
+
+    def __init__(self, name: str):
+        self._key = re.compile(r'"%s"\s*:\s*"' % re.escape(name))
+        self.raw = ""
+        self.value = ""
+        self.done = False
+        self._pos: int | None = None
+
+    def feed(self, chunk: str) -> str:
+        self.raw += chunk
+        if self.done: return ""
+        if self._pos is None:
+            m = self._key.search(self.raw)
+            if not m: return ""
+            self._pos = m.end()
+        raw, i, out = self.raw, self._pos, []
+        while i < len(raw):
+            c = raw[i]
+            if c == '"':
+                self.done = True; i += 1; break
+            if c == "\\":
+                if i + 1 >= len(raw): break  # 이스케이프가 조각 경계에서 잘림 → 다음 조각에서 처리
+                e = raw[i + 1]
+                if e == "u":
+                    if i + 6 > len(raw): break
+                    try: out.append(chr(int(raw[i + 2:i + 6], 16)))
+                    except ValueError: pass
+                    i += 6; continue
+                out.append(self._ESCAPES.get(e, e)); i += 2; continue
+            out.append(c); i += 1
+        self._pos = i
+        piece = "".join(out)
+        self.value += piece
+        return piece
+
+class SentenceSpeaker:
+    """스트리밍 답변을 문장 단위로 say()에 넘기고, 첫 문장까지 걸린 시간을 기록합니다."""
+    def __init__(self, say: Callable[[str], None]):
+        self.say = say
+        self.splitter = SentenceSplitter()
+        self.t0 = time.perf_counter()
+        self.started = False
+
+    def feed(self, text: str):
+        for sentence in self.splitter.feed(text):
+            self._say(sentence)
+
+    def flush(self):
+        rest = self.splitter.flush()
+        if rest: self._say(rest)
+
+    def _say(self, sentence: str):
+        if not self.started:
+            self.started = True
+            print(f"⏱️ 첫 문장까지 {(time.perf_counter() - self.t0) * 1000:.0f}ms")
+        self.say(sentence)
+
+ROUTER_INSTRUCTION = (
+    "너는 명령 라우터다. 한국어 문장을 보고 의도를 분류한다. "
+    + INTENT_RULES +
+    "오직 아래 JSON만 출력:\n"
+    '{ "intent": "dance|stop|game|ox_quiz|chat|joke", "normalized_text": "<의미만 보존한 간결한 문장>", '
+    '"speakable_reply": "<의도가 chat일 때 1~2문장 공감형 짧은 답변. dance/stop/game/joke/ox_quiz이면 빈 문자열>" }'
+)
+
+class GeminiClients:
+    """
+    미리 설정해 둔 Gemini 모델 클라이언트 모음. 시작할 때 한 번 만들고 모든 스레드가 같이 씁니다.
+    - transcriber: 음성 전사 (예전 경로)
+    - router     : 의도 분류 JSON (예전 경로)
+    - turn       : 전사·의도·답변·표정 통합 JSON (FUSED_TURN)
+    - chat       : 대화 세션용 (start_chat)
+    - json       : 농담/퀴즈 생성 JSON
+    모든 호출이 generate()/send()를 거치므로 호출 수·오류·지연 시간을 여기서 한 번에 잽니다.
+    """
+    def __init__(self):
+        self.models = {
+            "transcriber": genai.GenerativeModel(MODEL_NAME),
+            "router": genai.GenerativeModel(
+                MODEL_NAME, system_instruction=ROUTER_INSTRUCTION,
+                generation_config={"response_mime_type": "application/json", "temperature": 0.2}),
+            "turn": genai.GenerativeModel(
+                MODEL_NAME, system_instruction=TURN_INSTRUCTION,
+                generation_config={"response_mime_type": "application/json", "temperature": 0.4}),
+            "chat": genai.GenerativeModel(MODEL_NAME, system_instruction=SYSTEM_INSTRUCTION),
+            "json": genai.GenerativeModel(MODEL_NAME, generation_config={"response_mime_type": "application/json"}),
+        }
+        self._lock = threading.Lock()
+        self._stats = {name: [0, 0, 0.0] for name in self.models}  # [호출 수, 오류 수, 누적 ms]
+        print(f"✅ Gemini 클라이언트 준비: {', '.join(self.models)} ({MODEL_NAME})")
+
+    def _timed(self, name: str, call: Callable):
+        t0 = time.perf_counter()
+        ok = False
+        try:
+            result = call()
+            ok = True
+            return result
+        finally:
+            # 스트리밍 호출은 첫 응답 객체를 받을 때까지만 잽니다.
+            with self._lock:
+                stat = self._stats[name]
+                stat[0] += 1
+                stat[1] += (not ok)
+                stat[2] += (time.perf_counter() - t0) * 1000.0
+
+    def generate(self, name: str, contents, stream: bool = False):
+        model = self.models[name]
+        return self._timed(name, lambda: model.generate_content(contents, stream=stream))
+
+    def start_chat(self, history: list | None = None):
+        return self.models["chat"].start_chat(history=history or [])
+
+    def send(self, chat, text: str, stream: bool = False):
+        return self._timed("chat", lambda: chat.send_message(text, stream=stream))
+
+    def report(self) -> str:
+        with self._lock:
+            parts = [f"{name} {n}회/{total / n:.0f}ms" + (f"/오류 {err}" if err else "")
+                     for name, (n, err, total) in self._stats.items() if n]
+        return "📡 Gemini 호출: " + (", ".join(parts) if parts else "없음")
+
 @dataclass
 class RecorderState:
     recording: bool = False
     frames_q: queue.Queue = queue.Queue()
     stream: sd.InputStream | None = None
 
+def _notify_done(item):
+    """TTS 항목(dict)에 on_done 콜백이 있으면 실제로 말하기가 끝난 시점에 부릅니다."""
+    if isinstance(item, dict) and callable(item.get("on_done")):
+        try: item["on_done"]()
+        except Exception as e: print(f"⚠️ TTS on_done 콜백 오류: {e}")
+
 class SapiTTSWorker:
     def __init__(self):
         self._q: queue.Queue[str | dict | None] = queue.Queue()
@@ -240,9 +442,13 @@ class SapiTTSWorker:
                     if text:
                         print("🔈 TTS speaking..."); 
                         voice.Speak(text, 1); 
+                        if isinstance(item, dict) and item.get("on_done"):
+                            # 비동기(1) 발화라 끝난 시점을 알려면 재생 완료까지 기다려야 합니다.
+                            voice.WaitUntilDone(-1)
                         print("✅ TTS done")
 
                 finally:
+                    _notify_done(item)
                     voice.Rate = default_rate
                     voice.Volume = default_volume
                     self._q.task_done()
@@ -252,6 +458,42 @@ class SapiTTSWorker:
                 if pc is not None: pc.CoUninitialize()
             except Exception: pass
 
+TYPECAST_URL = "https://api.typecast.ai/v1/text-to-speech"
+
+def typecast_synthesize(text: str, tempo: float = 1.0, volume: int = 100, pitch: int = 0) -> bytes | None:
+    """Typecast로 text를 합성해 wav 바이트를 돌려줍니다. 키가 없거나 오류면 None. (재생 워커와 퀴즈 음성 미리 만들기가 같이 씀)"""
+    api_key = _get_env("TYPECAST_API_KEY")
+    voice_id = _get_env("TYPECAST_VOICE_ID")
+    if not api_key or not voice_id or not text:
+        return None
+    emotion = _get_env("TYPECAST_EMOTION", "")
+    intensity = float(_get_env("TYPECAST_EMOTION_INTENSITY", "1.0") or "1.0")
+    seed_env = _get_env("TYPECAST_SEED", "")
+    payload = {
+        "voice_id": voice_id, "text": text,
+        "model": _get_env("TYPECAST_MODEL", "ssfm-v21"), "language": _get_env("TYPECAST_LANGUAGE", "kor"),
+        "output": {
+            "volume": volume,
+            "audio_pitch": pitch,
+            "audio_tempo": tempo,
+            "audio_format": _get_env("TYPECAST_AUDIO_FORMAT", "wav")
+        }
+    }
+    if emotion: payload["prompt"] = {"emotion_preset": emotion, "emotion_intensity": intensity}
+    if seed_env and seed_env.isdigit(): payload["seed"] = int(seed_env)
+    r = requests.post(TYPECAST_URL, headers={"X-API-KEY": api_key, "Content-Type": "application/json"}, json=payload, timeout=60)
+    if r.status_code != 200:
+        print(f"❌ Typecast 오류 {r.status_code}: {r.text[:200]}")
+        return None
+    return r.content
+
+def _play_wav(data: bytes):
+    with io.BytesIO(data) as buf:
+        with wave.open(buf, "rb") as wf:
+            sr = wf.getframerate(); frames = wf.readframes(wf.getnframes())
+    audio = np.frombuffer(frames, dtype=np.int16).astype(np.float32) / 32768.0
+    sd.play(audio, sr); sd.wait()
+
 class TypecastTTSWorker:
     def __init__(self):
         self._q: queue.Queue[str | dict | None] = queue.Queue()
@@ -276,21 +518,10 @@ class TypecastTTSWorker:
         except Exception: pass
     def _run(self):
         try:
-            api_key = _get_env("TYPECAST_API_KEY")
-            voice_id = _get_env("TYPECAST_VOICE_ID")
-            if not api_key or not voice_id:
+            if not _get_env("TYPECAST_API_KEY") or not _get_env("TYPECAST_VOICE_ID"):
                 print("❗ TYPECAST_API_KEY 또는 TYPECAST_VOICE_ID가 비어있습니다."); self.ready.set(); return
-            model = _get_env("TYPECAST_MODEL", "ssfm-v21")
-            language = _get_env("TYPECAST_LANGUAGE", "kor")
-            audio_format = _get_env("TYPECAST_AUDIO_FORMAT", "wav")
-            emotion = _get_env("TYPECAST_EMOTION", "")
-            intensity = float(_get_env("TYPECAST_EMOTION_INTENSITY", "1.0") or "1.0")
-            seed_env = _get_env("TYPECAST_SEED", "")
-            seed = int(seed_env) if (seed_env and seed_env.isdigit()) else None
             self.ready.set()
             print("▶ Typecast TTS 준비 완료")
-            url = "https://api.typecast.ai/v1/text-to-speech"
-            headers = {"X-API-KEY": api_key, "Content-Type": "application/json"}
             while True:
                 item = self._q.get()
                 if item is None: self._q.task_done(); break
@@ -308,29 +539,19 @@ class TypecastTTSWorker:
                         pitch = 0
 
                     if not text: continue
-                    
-                    payload = {
-                        "voice_id": voice_id, "text": text, "model": model, "language": language, 
-                        "output": {
-                            "volume": volume, 
-                            "audio_pitch": pitch, 
-                            "audio_tempo": rate_multiplier, 
-                            "audio_format": audio_format
-                        }
-                    }
-                    if emotion: payload["prompt"] = {"emotion_preset": emotion, "emotion_intensity": intensity}
-                    if seed is not None: payload["seed"] = seed
-                    r = requests.post(url, headers=headers, json=payload, timeout=60)
-                    if r.status_code == 200:
-                        data = r.content
-                        with io.BytesIO(data) as buf:
-                            with wave.open(buf, "rb") as wf:
-                                sr = wf.getframerate(); sampwidth = wf.getsampwidth(); frames = wf.readframes(wf.getnframes())
-                        if sampwidth == 2: audio = np.frombuffer(frames, dtype=np.int16).astype(np.float32) / 32768.0
-                        else: audio = np.frombuffer(frames, dtype=np.int16).astype(np.float32) / 32768.0
-                        sd.play(audio, sr); sd.wait(); print("✅ TTS done")
-                    else: print(f"❌ Typecast 오류 {r.status_code}: {r.text[:200]}")
-                finally: self._q.task_done()
+
+                    # 미리 만들어 둔 음성(퀴즈 은행)이 있으면 합성 요청 없이 바로 재생합니다.
+                    data = None
+                    audio_path = item.get("audio") if isinstance(item, dict) else None
+                    if audio_path and os.path.exists(audio_path):
+                        with open(audio_path, "rb") as f: data = f.read()
+                    if data is None:
+                        data = typecast_synthesize(text, rate_multiplier, volume, pitch)
+                    if data:
+                        _play_wav(data); print("✅ TTS done")
+                finally:
+                    _notify_done(item)
+                    self._q.task_done()
         except Exception as e: print(f"ℹ️ Typecast TTS 스레드 오류: {e}"); self.ready.set()
 
 class PressToTalk:
@@ -355,26 +576,12 @@ class PressToTalk:
             print("❗ GOOGLE_API_KEY가 없습니다."); sys.exit(1)
 
         genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel(MODEL_NAME)
-        self.chat = genai.GenerativeModel(MODEL_NAME, system_instruction=SYSTEM_INSTRUCTION).start_chat(history=[])
-
-        self.router_model = genai.GenerativeModel(
-            MODEL_NAME,
-            system_instruction=(
-                "너는 명령 라우터다. 한국어 문장을 보고 의도를 분류한다. "
-                "dance=사용자가 실제로 춤을 '시작하라고' 명령/요청/승인. "
-                "game=가위바위보 게임을 시작하자는 요청. "
-                "ox_quiz=얼굴 인식 OX 퀴즈 게임을 시작하자는 요청. "
-                "joke=개그나 농담을 해달라는 명확한 요청. "  # "joke" 의도 정의 추가
-                "stop=춤을 '멈추라'는 명령/요청/승인. "
-                "chat=일반 대화(질문/잡담/설명/감정표현/춤에 대한 견해·가정적 질문 포함). "
-                "부정/금지/거절 표현(예:'춤 추지 마','춤은 안돼','그만두지 말고 계속')은 정확히 반영하라. "
-                "오직 아래 JSON만 출력:\n"
-                '{ "intent": "dance|stop|game|ox_quiz|chat|joke", "normalized_text": "<의미만 보존한 간결한 문장>", '
-                '"speakable_reply": "<의도가 chat일 때 1~2문장 공감형 짧은 답변. dance/stop/game/joke/ox_quiz이면 빈 문자열>" }'
-            ),
-            generation_config={"response_mime_type": "application/json", "temperature": 0.2}
-        )
+        self.clients = GeminiClients()
+        self.chat = self.clients.start_chat()
+
+        # 통합 호출은 chat 세션을 거치지 않으므로 최근 대화를 직접 들고 다니며 함께 보냅니다.
+        self.recent_turns: deque[tuple[str, str]] = deque(maxlen=RECENT_TURNS)
+        self.fastpath = IntentFastPath() if INTENT_FASTPATH else None
         
         self.start_dance_cb = start_dance_cb
         self.stop_dance_cb  = stop_dance_cb
@@ -403,6 +610,10 @@ class PressToTalk:
         else: self.tts = SapiTTSWorker()
         self.tts.start()
 
+        # OX 퀴즈 문제는 시작할 때부터 백그라운드에서 디스크에 쌓아 두고, 게임 중에는 꺼내 쓰기만 합니다.
+        self.quiz_bank = QuizBank(self._generate_quizzes, render_audio=typecast_synthesize if engine == "typecast" else None)
+        self.quiz_bank.start()
+
         self.state = RecorderState()
         self._print_intro()
         if ENABLE_GREETING:
@@ -475,26 +686,17 @@ class PressToTalk:
             self.announcement_thread.start()
             print("✅ 60초마다 안내 방송을 시작합니다.")
 
-    def _fetch_quizzes_in_background(self, result_container: list):
-            """[백그라운드 스레드용] Gemini API를 호출하여 퀴즈 목록을 생성하고 result_container에 저장합니다."""
-            print("  - 🏃 (백그라운드) 본 게임 퀴즈 생성을 시작합니다...")
-            try:
-                quiz_prompt = (
-                    "어린이도 이해할 수 있는, 재미있고 간단한 상식 OX 퀴즈를 한국어로 10개만 만들어줘. "
-                    "이전에 출제했던 문제와는 다른 새로운 주제로 내줘."
-                    "출력은 반드시 다음 JSON 리스트 형식이어야 해. 다른 설명은 절대 추가하지 마.\n"
-                    '[{"question": "<퀴즈1 질문>", "answer": "O 또는 X"}, {"question": "<퀴즈2 질문>", "answer": "O 또는 X"}]'
-                )
-                quiz_response = genai.GenerativeModel(MODEL_NAME).generate_content(
-                    quiz_prompt, 
-                    generation_config={"response_mime_type": "application/json"}
-                )
-                raw_json = _extract_text(quiz_response)
-                quizzes = json.loads(raw_json)
-                result_container.extend(quizzes) # 결과를 컨테이너에 추가
-                print(f"  - ✅ (백그라운드) 퀴즈 {len(quizzes)}개 생성 완료!")
-            except Exception as e:
-                print(f"  - ❌ (백그라운드) 퀴즈 생성 실패: {e}")  
+    def _generate_quizzes(self, n: int, avoid: list[str]) -> list:
+        """[퀴즈 은행 생산자 스레드용] Gemini로 OX 퀴즈 n개를 만듭니다. avoid에 있는 문제와는 겹치지 않게 요청합니다."""
+        print(f"  - 🏃 (퀴즈 은행) 퀴즈 {n}개 생성을 요청합니다...")
+        quiz_prompt = (
+            f"어린이도 이해할 수 있는, 재미있고 간단한 상식 OX 퀴즈를 한국어로 {n}개만 만들어줘. "
+            "아래 문제들과 주제나 내용이 겹치지 않는 새로운 문제여야 해.\n"
+            + "".join(f"- {q}\n" for q in avoid[-30:]) +
+            "출력은 반드시 다음 JSON 리스트 형식이어야 해. 다른 설명은 절대 추가하지 마.\n"
+            '[{"question": "<퀴즈1 질문>", "answer": "O 또는 X"}, {"question": "<퀴즈2 질문>", "answer": "O 또는 X"}]'
+        )
+        return json.loads(_extract_text(self.clients.generate("json", quiz_prompt)))
 
     def _print_intro(self):
         print("\n=== Gemini PTT (통합 버전) ===")
@@ -590,12 +792,17 @@ class PressToTalk:
             return buf.getvalue()
 
     def _route_intent(self, text: str) -> dict:
+        predicted = None
+        if self.fastpath:
+            fast, predicted = self.fastpath.decide(text)
+            if fast: return {"intent": fast, "normalized_text": text, "speakable_reply": ""}
         try:
-            resp = self.router_model.generate_content(text)
+            resp = self.clients.generate("router", text)
             raw = _extract_text(resp); data = json.loads(raw)
             if not isinstance(data, dict): raise ValueError("router JSON is not a dict")
             intent = data.get("intent", "chat")
-            if intent not in ("dance", "stop", "game", "chat", "joke", "ox_quiz"): intent = "chat"
+            if intent not in INTENTS: intent = "chat"
+            if self.fastpath: self.fastpath.record(text, predicted, intent)
             return {"intent": intent, "normalized_text": str(data.get("normalized_text", text)), "speakable_reply": str(data.get("speakable_reply", "")) if intent == "chat" else ""}
         except Exception as e:
             print(f"(router 폴백) {e}")
@@ -619,23 +826,123 @@ class PressToTalk:
         elif any(w in low_text for w in ["궁금", "생각", "글쎄", "흠.."]): self.emotion_queue.put("THINKING")
         else: self.emotion_queue.put("NEUTRAL")
 
+    def _fused_turn(self, wav_bytes: bytes, speaker: SentenceSpeaker | None = None) -> dict | None:
+        """
+        음성을 한 번 보내 전사·의도·답변·표정을 JSON으로 받습니다. 사람 말이 없으면 None.
+        speaker를 주면 응답을 스트리밍으로 받아 chat 답변을 문장이 완성되는 대로 말합니다.
+        """
+        b64 = base64.b64encode(wav_bytes).decode("ascii")
+        context = "\n".join(f"사용자: {u}\n모티: {m}" for u, m in self.recent_turns)
+        prompt = (f"최근 대화:\n{context}\n\n" if context else "") + "이번 음성:"
+        parts = [{"text": prompt}, {"inline_data": {"mime_type": "audio/wav", "data": b64}}]
+        predicted = None
+        if speaker is None:
+            data = json.loads(_extract_text(self.clients.generate("turn", parts)))
+            emotion_sent = False
+            if self.fastpath and isinstance(data, dict):
+                predicted = self.fastpath.predict(str(data.get("transcript") or ""))[0]
+        else:
+            fields = {k: JsonStringField(k) for k in ("transcript", "intent", "emotion", "reply")}
+            emotion_sent = False
+            decided = self.fastpath is None
+            try:
+                for chunk in self.clients.generate("turn", parts, stream=True):
+                    piece = _chunk_text(chunk)
+                    for name in ("transcript", "intent", "emotion"): fields[name].feed(piece)
+                    if not decided and fields["transcript"].done:
+                        # 전사가 끝나자마자 로컬 분류기에 먼저 물어, 확실한 명령이면 나머지 응답을 기다리지 않습니다.
+                        decided = True
+                        text = fields["transcript"].value.strip()
+                        fast, predicted = self.fastpath.decide(text, usable=tuple(i for i in INTENTS if i != "chat")) if text else (None, None)
+                        if fast:
+                            return {"user_text": text, "intent": fast, "normalized_text": text, "reply": "",
+                                    "emotion": None, "streamed": False, "emotion_sent": False}
+                    new_reply = fields["reply"].feed(piece)
+                    # 의도가 chat으로 확정된 뒤에만 말합니다. 표정은 첫 문장 전에 바꿉니다.
+                    if new_reply and fields["intent"].done and fields["intent"].value == "chat":
+                        if not emotion_sent and fields["emotion"].value.upper() in EMOTIONS and self.emotion_queue:
+                            self.emotion_queue.put(fields["emotion"].value.upper()); emotion_sent = True
+                        speaker.feed(new_reply)
+                data = json.loads(fields["reply"].raw)
+            except Exception as e:
+                if not speaker.started: raise
+                # 이미 말하기 시작했으면 폴백하면 같은 말을 또 하게 되므로 받은 데까지로 마무리합니다.
+                print(f"(통합 호출 스트림 중단) {e}")
+                speaker.flush()
+                return {"user_text": fields["transcript"].value, "intent": "chat", "normalized_text": fields["transcript"].value,
+                        "reply": fields["reply"].value, "emotion": None, "streamed": True, "emotion_sent": emotion_sent}
+            speaker.flush()
+        if not isinstance(data, dict) or "transcript" not in data: raise ValueError("turn JSON has no transcript")
+        user_text = str(data.get("transcript") or "").strip()
+        if not user_text: return None
+        intent = data.get("intent", "chat")
+        if intent not in INTENTS: intent = "chat"
+        emotion = str(data.get("emotion") or "").upper()
+        if self.fastpath: self.fastpath.record(user_text, predicted, intent)
+        return {"user_text": user_text, "intent": intent,
+                "normalized_text": str(data.get("normalized_text", user_text)),
+                "reply": str(data.get("reply") or "") if intent == "chat" else "",
+                "emotion": emotion if emotion in EMOTIONS else None,
+                "streamed": speaker is not None and speaker.started, "emotion_sent": emotion_sent}
+
+    def _legacy_turn(self, wav_bytes: bytes) -> dict | None:
+        """예전 경로: 전사 호출 → 라우터 호출. (대화 답변이 없으면 호출한 쪽에서 chat 세션에 묻습니다.)"""
+        b64 = base64.b64encode(wav_bytes).decode("ascii")
+        parts = [{"text": PROMPT_TEXT}, {"inline_data": {"mime_type": "audio/wav", "data": b64}}]
+        user_text = _extract_text(self.clients.generate("transcriber", parts))
+        if not user_text: return None
+        route = self._route_intent(user_text)
+        return {"user_text": user_text, "intent": route["intent"], "normalized_text": route["normalized_text"],
+                "reply": route.get("speakable_reply", ""), "emotion": None}
+
+    def _stream_chat(self, user_text: str) -> str:
+        """chat 세션 답변을 스트리밍으로 받아 문장이 완성되는 대로 말하고, 전체 답변을 돌려줍니다."""
+        speaker = SentenceSpeaker(self._speak_and_subtitle)
+        pieces = []
+        # 스트림을 끝까지 읽어야 chat 세션 기록에 답변이 남습니다.
+        for chunk in self.clients.send(self.chat, user_text, stream=True):
+            piece = _chunk_text(chunk)
+            pieces.append(piece)
+            speaker.feed(piece)
+        speaker.flush()
+        return "".join(pieces).strip()
+
+    def _understand(self, wav_bytes: bytes) -> dict | None:
+        """통합 호출을 먼저 시도하고, 실패하면 예전 경로로 폴백합니다."""
+        t0 = time.perf_counter()
+        if FUSED_TURN:
+            try:
+                speaker = SentenceSpeaker(self._speak_and_subtitle) if STREAM_REPLY else None
+                turn = self._fused_turn(wav_bytes, speaker)
+                print(f"⏱️ 음성 이해 {(time.perf_counter() - t0) * 1000:.0f}ms (통합 호출 1회)")
+                return turn
+            except Exception as e:
+                print(f"(통합 호출 폴백) {e}")
+        turn = self._legacy_turn(wav_bytes)
+        print(f"⏱️ 음성 이해 {(time.perf_counter() - t0) * 1000:.0f}ms (전사 + 라우터)")
+        return turn
+
     @keep_awake
     def _transcribe_then_chat(self, wav_bytes: bytes):
         try:
-            b64 = base64.b64encode(wav_bytes).decode("ascii")
-            parts = [{"text": PROMPT_TEXT}, {"inline_data": {"mime_type": "audio/wav", "data": b64}}]
-            resp = self.model.generate_content(parts)
-            user_text = _extract_text(resp)
-            if not user_text: print("📝 전사 결과가 비어 있습니다.\n"); return
+            turn = self._understand(wav_bytes)
+            if not turn: print("📝 전사 결과가 비어 있습니다.\n"); return
+            user_text = turn["user_text"]
             ts = datetime.now().strftime("%H:%M:%S"); print(f"[{ts}] [User ] {user_text}")
-            route = self._route_intent(user_text)
-            intent, model_text, speak_text = route["intent"], "", ""
+            intent, model_text, speak_text = turn["intent"], "", ""
 
             if intent == "chat":
-                if route.get("speakable_reply"): model_text = route["speakable_reply"]
-                else: reply = self.chat.send_message(user_text); model_text = _extract_text(reply) or ""
-                speak_text = model_text
-                self._analyze_and_send_emotion(model_text) 
+                if turn.get("streamed"):
+                    model_text = turn["reply"]  # 스트리밍 중에 이미 문장 단위로 말했습니다.
+                elif turn["reply"]:
+                    model_text = speak_text = turn["reply"]
+                elif STREAM_REPLY:
+                    model_text = self._stream_chat(user_text)
+                else:
+                    reply = self.clients.send(self.chat, user_text); model_text = speak_text = _extract_text(reply) or ""
+                if turn.get("emotion_sent"): pass
+                elif turn["emotion"] and self.emotion_queue: self.emotion_queue.put(turn["emotion"])
+                else: self._analyze_and_send_emotion(model_text)
 
             elif intent == "dance":
                 print("💡 의도: DANCE START")
@@ -682,10 +989,7 @@ class PressToTalk:
                     joke_data = None
                     try:
                         # 2. JSON 출력을 기대하며 Gemini 모델 호출
-                        joke_response = genai.GenerativeModel(MODEL_NAME).generate_content(
-                            joke_prompt,
-                            generation_config={"response_mime_type": "application/json"}
-                        )
+                        joke_response = self.clients.generate("json", joke_prompt)
                         raw_json = _extract_text(joke_response)
                         joke_data = json.loads(raw_json)
 
@@ -762,10 +1066,6 @@ class PressToTalk:
                     }
                 }
 
-                # 백그라운드 스레드가 결과를 담을 컨테이너 생성
-                quiz_result_container = []
-                self.generated_quizzes = []
-
                 quiz_round_counter = 0
                 main_game_round_counter = 0
                 is_first_round = True
@@ -787,13 +1087,6 @@ class PressToTalk:
                     self._speak_and_subtitle("먼저, 몸풀기로 연습문제를 몇 개 풀어볼게요. 첫 문제 나갑니다!")
                     self.tts.wait()
 
-                     # 백그라운드에서 퀴즈 생성을 시작시킴
-                    quiz_fetch_thread = threading.Thread(
-                        target=self._fetch_quizzes_in_background,
-                        args=(quiz_result_container,)
-                    )
-                    quiz_fetch_thread.start()
-
                     while not is_game_over and not self.stop_event.is_set():
                         if not is_first_round and not is_predefined:
                             print("  - 🤔 다음 라운드 준비를 위해 THINKING 표정으로 변경")
@@ -813,13 +1106,6 @@ class PressToTalk:
                                 self._speak_and_subtitle("자, 이제 연습이 끝났습니다! 지금부터 본격적으로 시작하겠습니다.")
                                 self.tts.wait()
 
-                                # 백그라운드 작업이 끝날 때까지 여기서 잠시 대기 (대부분 바로 통과)
-                                print("  - ⌛ 본 게임 퀴즈 준비 완료 여부 확인 중...")
-                                quiz_fetch_thread.join(timeout=5.0) # 최대 5초간 기다림
-
-                                # 백그라운드에서 가져온 퀴즈를 self 변수로 옮김
-                                self.generated_quizzes = quiz_result_container
-
                                 self._speak_and_subtitle("마지막까지 살아남으시는 분께는 특별한 상품을 드릴게요!")
                                 self.tts.wait()
                                 is_main_game_started = True
@@ -843,9 +1129,9 @@ class PressToTalk:
                                     if self.emotion_queue: self.emotion_queue.put("NEUTRAL")
                                     is_crazy_mode_active = False # 상태를 '일반 모드'로 다시 변경
 
-                                if self.generated_quizzes:
-                                    quiz_data = self.generated_quizzes.pop(0)
-                                    print(f"  - 사전 생성 퀴즈 사용: {quiz_data}")
+                                quiz_data = self.quiz_bank.pop()
+                                if quiz_data:
+                                    print(f"  - 퀴즈 은행 문제 사용 (남은 {len(self.quiz_bank)}개): {quiz_data}")
 
                                 else:
                                     print(" - Gemini API 실시간 새 퀴즈를 생성합니다.")
@@ -856,10 +1142,7 @@ class PressToTalk:
                                         '{ "question": "<퀴즈 질문>", "answer": "O 또는 X" }'
                                     )
                                     try:
-                                        quiz_response = genai.GenerativeModel(MODEL_NAME).generate_content(
-                                            quiz_prompt, 
-                                            generation_config={"response_mime_type": "application/json"}
-                                        )
+                                        quiz_response = self.clients.generate("json", quiz_prompt)
                                         raw_json = _extract_text(quiz_response)
                                         quiz_data = json.loads(raw_json)
                                         print(f" - 생성된 퀴즈: {quiz_data}")
@@ -886,7 +1169,9 @@ class PressToTalk:
                                 self._speak_and_subtitle(random.choice(thinking_phrases))
                                 self.tts.wait() # 추임새를 끝까지 말하도록 기다립니다.
                         
-                        self._speak_and_subtitle(quiz_data["question"])
+                        # 퀴즈 은행이 미리 만들어 둔 음성이 있으면 합성 없이 바로 재생됩니다.
+                        self._speak_and_subtitle({"text": quiz_data["question"], "audio": quiz_data["audio"]}
+                                                 if quiz_data.get("audio") else quiz_data["question"])
                         self.tts.wait()
                         self._speak_and_subtitle("O는 오른쪽에, X는 왼쪽에 서주세요.")
                         self.tts.wait()
@@ -992,7 +1277,11 @@ class PressToTalk:
                             threading.Thread(target=self.play_rps_motion_cb, daemon=True).start()
 
                         self._speak_and_subtitle("가위! 바위!")
-                        self._speak_and_subtitle("보!")
+                        # "보!"를 다 말한 시각을 워커에 알려 그 직후 프레임만 인식하게 합니다.
+                        self._speak_and_subtitle({
+                            "text": "보!",
+                            "on_done": lambda: self.rps_command_q.put({"command": "SHOOT", "t": time.perf_counter()}),
+                        })
                         self.tts.wait()
 
                         game_result = ""
@@ -1007,11 +1296,11 @@ class PressToTalk:
                         # ✨ 게임 결과에 따라 표정 변화 추가
                         if "아고! 실수로 눈을" in game_result:
                             if self.emotion_queue: self.emotion_queue.put("CLOSE")
-                        elif "당신이 이겼어요" in game_result:
+                        elif "당신이 이겼어요" in game_result or "여러분이 이겼어요" in game_result:
                             if self.emotion_queue: self.emotion_queue.put("SAD")
                         elif "제가 이겼네요" in game_result:
                             if self.emotion_queue: self.emotion_queue.put("HAPPY")
-                        elif "비겼네요" in game_result:
+                        elif "비겼네요" in game_result or "승부가 갈렸네요" in game_result:
                             if self.emotion_queue: self.emotion_queue.put("SURPRISED")
                             
                         time.sleep(2) # 표정을 보여주기 위해 잠시 대기
@@ -1028,8 +1317,10 @@ class PressToTalk:
                             time.sleep(2)
                             continue
     
-                        elif "이겼" in game_result:
-                            if "제가 이겼네요"  in game_result:
+                        elif "이겼" in game_result or "승부가 갈렸네요" in game_result:
+                            if "승부가 갈렸네요" in game_result:
+                                self._speak_and_subtitle(f"{game_result} 진 분은 벌칙으로, 이긴 분은 축하하는 뜻으로 다 같이 춤춰요!")
+                            elif "제가 이겼네요"  in game_result:
                                 self._speak_and_subtitle(f"{game_result} 제가 이겼으니 벌칙을 받아야죠! 저랑 같이 춤춰 주세요")
                             else:
                                 self._speak_and_subtitle(f"{game_result} 까비! 벌칙을 피하셨네요. 제가 춤추는거 보여드릴게요.")
@@ -1054,6 +1345,9 @@ class PressToTalk:
                     if self.emotion_queue: self.emotion_queue.put("NEUTRAL")
             
             print(f"[{ts}] [Gemini] {model_text}\n")
+            self.recent_turns.append((user_text, model_text))
+            if self.fastpath: print(self.fastpath.report())
+            print(self.clients.report())
             if speak_text: 
                 if self.subtitle_queue:
                     self.subtitle_queue.put(speak_text)
@@ -1178,6 +1472,7 @@ class PressToTalk:
                 break
         
         print("PTT App 종료 절차 시작...")
+        self.quiz_bank.stop()
         if self.current_listener and self.current_listener.is_alive():
             self.current_listener.stop()
         try:
@@ -0,0 +1,190 @@
+# ============================================================
+#Licensed to the Apache Software Foundation (ASF) under one
+#or more contributor license agreements.  See the NOTICE file
+#distributed with this work for additional information
+#regarding copyright ownership.  The ASF licenses this file
+#to you under the Apache License, Version 2.0 (the
+#"License"); you may not use this file except in compliance
+#with the License.  You may obtain a copy of the License at
+
+#    http://www.apache.org/licenses/LICENSE-2.0
+
+#Unless required by applicable law or agreed to in writing, software
+#distributed under the License is distributed on an "AS IS" BASIS,
+#WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#See the License for the specific language governing permissions and
+#limitations under the License.
+# ============================================================
+# intent_fastpath.py
+# LLM 라우터 앞단의 로컬 의도 분류기.
+# 1단계: 미리 컴파일한 키워드/부정 규칙 (짧은 명령문만)
+# 2단계: LLM이 판정한 과거 발화로 학습한 글자 n-gram 나이브 베이즈
+# 확신할 때만 바로 답하고, 애매한 문장은 LLM으로 넘깁니다.
+
+from __future__ import annotations
+import os
+import re
+import json
+import math
+import random
+import threading
+from collections import Counter, defaultdict
+
+INTENT_LOG = os.getenv("INTENT_LOG", "intent_log.jsonl")              # LLM 판정 기록 (학습 데이터)
+FASTPATH_THRESHOLD = float(os.getenv("FASTPATH_THRESHOLD", "0.9"))    # n-gram 모델 사후확률 기준
+FASTPATH_MIN_SAMPLES = int(os.getenv("FASTPATH_MIN_SAMPLES", "30"))   # 이만큼 쌓이기 전엔 n-gram 모델을 쓰지 않음
+FASTPATH_MAX_CHARS = int(os.getenv("FASTPATH_MAX_CHARS", "15"))       # 이보다 긴 문장은 규칙으로 판정하지 않음
+FASTPATH_AUDIT = float(os.getenv("FASTPATH_AUDIT", "0.1"))            # 확신한 판정 중 LLM으로 다시 확인할 비율
+
+INTENTS = ("dance", "stop", "game", "chat", "joke", "ox_quiz")
+
+# 부정/금지/거절/의견이 섞이면 키워드가 있어도 명령이 아닐 수 있으므로 규칙으로 판정하지 않습니다.
+_NEGATION = re.compile(r"(하지\s?마|추지\s?마|안\s?돼|안\s?되|그만두지\s?마|멈추지\s?마|말고|싫어|안\s|못\s|말아|별로|없)")
+_QUESTION = re.compile(r"(\?|어떻게|왜|뭐|무슨|언제|어디|누가|할\s?수\s?있|좋아해|잘\s?해)")
+# 키워드만 있다고 명령은 아닙니다("오늘 춤 봤어", "농담이야"). 문장 끝이 명령형일 때만 맞춥니다.
+_END = r"[요!.~\s]*$"
+_RULES = [
+    ("ox_quiz", re.compile(r"(ox|오엑스|오\s엑스)\s*(퀴즈|게임)(\s?(하자|해\s?줘|해|시작))?" + _END, re.IGNORECASE)),
+    ("game",    re.compile(r"가위\s?바위\s?보(\s?(하자|해\s?줘|해|게임\s?하자|한\s?판\s?하자))?" + _END)),
+    ("joke",    re.compile(r"(농담|개그|아재\s?개그)\s?(하나\s?)?(해\s?줘|해\s?봐|해)" + _END)),
+    ("stop",    re.compile(r"^(이제\s?)?(춤\s?)?(그만|멈춰|스톱|정지)(\s?(해\s?줘|해|춰|둬|하자))?" + _END)),
+    ("dance",   re.compile(r"춤\s?(을\s?)?(춰\s?줘|춰\s?봐|춰|추자|보여\s?줘)" + _END)),
+]
+_PUNCT = re.compile(r"[^\w\s]")
+
+def normalize(text: str) -> str:
+    return " ".join(_PUNCT.sub(" ", text.lower()).split())
+
+def rule_intent(text: str, max_chars: int = FASTPATH_MAX_CHARS) -> str | None:
+    """짧은 명령문에서 규칙 하나만 맞을 때 그 의도를 돌려줍니다. 애매하면 None."""
+    t = text.strip()
+    if len(t) > max_chars or _NEGATION.search(t) or _QUESTION.search(t):
+        return None
+    matched = {intent for intent, pattern in _RULES if pattern.search(t)}
+    return matched.pop() if len(matched) == 1 else None
+
+class CharNgramNB:
+    """글자 n-gram 다항 나이브 베이즈. 수백 문장 규모라 학습/예측 모두 1ms 안쪽입니다."""
+    def __init__(self, n_min: int = 1, n_max: int = 3, alpha: float = 0.5):
+        self.n_min, self.n_max, self.alpha = n_min, n_max, alpha
+        self.fitted = False
+
+    def _grams(self, text: str) -> list[str]:
+        t = f" {normalize(text)} "
+        return [t[i:i + n] for n in range(self.n_min, self.n_max + 1) for i in range(len(t) - n + 1)]
+
+    def fit(self, samples: list[tuple[str, str]]):
+        self.counts: dict[str, Counter] = defaultdict(Counter)
+        docs = Counter()
+        for text, intent in samples:
+            self.counts[intent].update(self._grams(text))
+            docs[intent] += 1
+        total = sum(docs.values())
+        self.vocab = len({g for c in self.counts.values() for g in c})
+        self.priors = {k: math.log(v / total) for k, v in docs.items()}
+        self.totals = {k: sum(c.values()) for k, c in self.counts.items()}
+        self.fitted = total > 0
+
+    def predict(self, text: str) -> tuple[str, float]:
+        """(의도, 사후확률)"""
+        grams = self._grams(text)
+        scores = {}
+        for intent, prior in self.priors.items():
+            c, denom = self.counts[intent], self.totals[intent] + self.alpha * (self.vocab + 1)
+            scores[intent] = prior + sum(math.log((c[g] + self.alpha) / denom) for g in grams)
+        best = max(scores, key=scores.get)
+        z = sum(math.exp(s - scores[best]) for s in scores.values())
+        return best, 1.0 / z
+
+class IntentFastPath:
+    """
+    decide(text) → (지금 바로 쓸 의도 또는 None, 로컬 예측 또는 None)
+    - 바로 쓸 의도가 None이면 LLM에 묻고, 그 판정을 record()로 알려 주세요.
+      (학습 데이터로 쌓이고, 로컬 예측이 있었다면 정확도 집계에 들어갑니다.)
+    - 확신한 판정도 FASTPATH_AUDIT 비율만큼은 LLM으로 넘겨 정확도를 계속 잽니다.
+    """
+    def __init__(self, log_path: str = INTENT_LOG, threshold: float = FASTPATH_THRESHOLD,
+                 min_samples: int = FASTPATH_MIN_SAMPLES, audit_rate: float = FASTPATH_AUDIT,
+                 retrain_every: int = 20):
+        self.log_path = log_path
+        self.threshold = threshold
+        self.min_samples = min_samples
+        self.audit_rate = audit_rate
+        self.retrain_every = retrain_every
+        self.model = CharNgramNB()
+        self._lock = threading.Lock()
+        self._samples = self._load()
+        self._since_fit = 0
+        self._fit()
+        self.decided = self.hits = self.audited = self.agreed = 0
+        print(f"✅ 의도 빠른 경로 준비 (학습 문장 {len(self._samples)}개, 기준 {self.threshold:.0%})")
+
+    def _load(self) -> list[tuple[str, str]]:
+        samples = []
+        try:
+            with open(self.log_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        row = json.loads(line)
+                        if row.get("intent") in INTENTS and row.get("text"):
+                            samples.append((row["text"], row["intent"]))
+                    except ValueError:
+                        continue
+        except FileNotFoundError:
+            pass
+        return samples
+
+    def _fit(self):
+        if len(self._samples) >= self.min_samples:
+            self.model.fit(self._samples)
+        self._since_fit = 0
+
+    def predict(self, text: str) -> tuple[str | None, str, float]:
+        """(의도 또는 None, 근거 'rule'|'ngram'|'', 확신도)"""
+        intent = rule_intent(text)
+        if intent:
+            return intent, "rule", 1.0
+        if self.model.fitted:
+            with self._lock:
+                intent, p = self.model.predict(text)
+            if p >= self.threshold:
+                return intent, "ngram", p
+        return None, "", 0.0
+
+    def decide(self, text: str, usable: tuple[str, ...] = INTENTS) -> tuple[str | None, str | None]:
+        """usable에 없는 의도는 바로 쓰지 않고 예측으로만 돌려줍니다. (예: 통합 호출 중 chat)"""
+        intent, source, p = self.predict(text)
+        with self._lock:
+            self.decided += 1
+        if intent is None:
+            return None, None
+        if intent not in usable or random.random() < self.audit_rate:
+            return None, intent  # 감사 대상: LLM 판정과 비교만 합니다.
+        with self._lock:
+            self.hits += 1
+        print(f"⚡ 빠른 경로 의도: {intent} ({source}, {p:.2f})")
+        return intent, intent
+
+    def record(self, text: str, predicted: str | None, llm_intent: str):
+        """LLM 판정을 기록합니다. 로컬 예측이 있었으면 일치 여부를 셉니다."""
+        with self._lock:
+            if predicted is not None:
+                self.audited += 1
+                self.agreed += (predicted == llm_intent)
+                if predicted != llm_intent:
+                    print(f"⚠️ 빠른 경로 불일치: '{text}' 로컬={predicted}, LLM={llm_intent}")
+            self._samples.append((text, llm_intent))
+            try:
+                with open(self.log_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps({"text": text, "intent": llm_intent}, ensure_ascii=False) + "\n")
+            except OSError as e:
+                print(f"⚠️ 의도 기록 저장 실패: {e}")
+            self._since_fit += 1
+            if self._since_fit >= self.retrain_every:
+                self._fit()
+
+    def report(self) -> str:
+        with self._lock:
+            hit = self.hits / self.decided if self.decided else 0.0
+            acc = f"{self.agreed / self.audited:.0%} ({self.audited}건)" if self.audited else "-"
+            return f"⚡ 의도 빠른 경로: 적중 {self.hits}/{self.decided} ({hit:.0%}), LLM 대비 정확도 {acc}"
@@ -38,6 +38,8 @@ from function import face as F
 from function import wheel as W
 from function import dance as D
 from function import dxl_io as IO
+from function.frame_bus import FrameBus, LatestBus
+from function.shm_ring import SharedFrameRing, RingFrameSource, ring_bridge_worker
 
 from gemini_api import PressToTalk
 from display.main import run_face_app
@@ -120,7 +122,8 @@ def main():
     rps_result_q = multiprocessing.Queue()
     ox_command_q = multiprocessing.Queue()
     ox_result_q = multiprocessing.Queue()
-    video_frame_q = queue.Queue(maxsize=1)
+    frame_bus = FrameBus()  # 카메라 프레임을 복사 없이 여러 소비자에게 나눠 주는 채널
+    track_results = LatestBus()  # 트래커의 프레임별 인식 결과(TrackResult) 채널 → OX 퀴즈가 구독
     sleepy_event = threading.Event()
     shared_state = {'mode': 'tracking'}
 
@@ -155,11 +158,14 @@ def main():
 
     cam_default = str(_default_cam_index())
     cam_index = int(_get_env("CAM_INDEX", cam_default))
+    # VIDEO_SOURCE에 녹화 파일/이미지 폴더를 주면 웹캠 없이 같은 파이프라인을 돌릴 수 있습니다.
+    video_source = _get_env("VIDEO_SOURCE", str(cam_index))
 
     t_face = threading.Thread(
         target=F.face_tracker_worker,
-        args=(port, pkt, dxl_lock, stop_event, video_frame_q, sleepy_event, shared_state),
-        kwargs=dict(camera_index=cam_index, draw_mesh=True, print_debug=True),
+        args=(port, pkt, dxl_lock, stop_event, frame_bus, sleepy_event, shared_state),
+        kwargs=dict(camera_index=cam_index, draw_mesh=True, print_debug=True, source=video_source,
+                    result_bus=track_results),
         name="face", daemon=True)
 
     # 3. 춤 시작 함수 호출 시 필요한 모든 정보(shared_state, home_pan, home_tilt)를 전달합니다.
@@ -177,14 +183,31 @@ def main():
         args=(emotion_queue, hotword_queue, stop_event, sleepy_event, t_ptt),
         name="visual_face", daemon=True)
     
-    t_rps_worker = threading.Thread(
+    # VISION_PROCESSES=1이면 가위바위보 워커를 별도 프로세스로 띄워 GIL 경합을 피합니다.
+    # (트래커는 다이나믹셀 포트를 직접 쓰므로 이 프로세스에 남고,
+    #  OX 퀴즈는 트래커 결과만 세므로 스레드로 충분합니다.)
+    frame_ring = None
+    t_ring_bridge = None
+    if C.VISION_PROCESSES:
+        frame_ring = SharedFrameRing.create(n_slots=C.FRAME_RING_SLOTS, slot_bytes=C.FRAME_RING_SLOT_BYTES)
+        rps_frames = RingFrameSource(frame_ring.name, 0)
+        t_ring_bridge = threading.Thread(
+            target=ring_bridge_worker,
+            args=(frame_bus, frame_ring, stop_event),
+            name="frame_ring", daemon=True)
+        worker_cls = multiprocessing.Process
+    else:
+        rps_frames = frame_bus
+        worker_cls = threading.Thread
+
+    t_rps_worker = worker_cls(
         target=rock_paper_game_worker,
-        args=(rps_command_q, rps_result_q, video_frame_q),
+        args=(rps_command_q, rps_result_q, rps_frames),
         name="rps_worker", daemon=True)
     
     t_ox_worker = threading.Thread(
         target=ox_quiz_game_worker,
-        args=(ox_command_q, ox_result_q, video_frame_q), 
+        args=(ox_command_q, ox_result_q, track_results), 
         name="ox_worker", daemon=True)
     
     t_wheels = threading.Thread(
@@ -194,25 +217,33 @@ def main():
 
     # ... (이하 스레드 시작 및 종료 코드는 동일합니다) ...
     t_face.start()
-    print(f"▶ FaceTracker 시작 (camera_index={cam_index})")
+    print(f"▶ FaceTracker 시작 (source={video_source})")
     t_visual_face.start()
     print("▶ Visual Face App 스레드 시작")
     t_ptt.start()
     print("▶ PTT App 스레드 시작")
+    if t_ring_bridge:
+        t_ring_bridge.start()
+    worker_kind = "프로세스" if C.VISION_PROCESSES else "스레드"
     t_rps_worker.start() 
-    print("▶ 가위바위보 게임 스레드 시작")
+    print(f"▶ 가위바위보 게임 {worker_kind} 시작")
     t_ox_worker.start()
     print("▶ OX 퀴즈 게임 스레드 시작")
     t_wheels.start()
     print("▶ Wheel 제어 스레드 시작")
 
     try:
-        F.display_loop_main_thread(stop_event, window_name="Camera Feed (on Laptop)")
+        F.display_loop_main_thread(stop_event, window_name="Camera Feed (on Laptop)", frame_bus=frame_bus)
     except KeyboardInterrupt:
         print("\n🛑 KeyboardInterrupt 감지 → 종료 신호 보냄")
         stop_event.set()
     finally:
         if not stop_event.is_set(): stop_event.set()
+        frame_bus.close()  # 프레임을 기다리던 워커를 깨웁니다.
+        track_results.close()
+        # 게임 워커는 명령 큐에서 블록하며 기다리므로 STOP을 넣어 깨웁니다. (별도 프로세스여도 동일)
+        rps_command_q.put("STOP")
+        ox_command_q.put("STOP")
         print("▶ 모든 스레드 종료 대기 중...")
         if subtitle_q:
             subtitle_q.put("__QUIT__")
@@ -223,6 +254,11 @@ def main():
         t_face.join(timeout=3.0)
         t_rps_worker.join(timeout=5.0)
         t_ox_worker.join(timeout=5.0)
+        if t_ring_bridge:
+            t_ring_bridge.join(timeout=1.0)
+        if frame_ring:
+            if t_rps_worker.is_alive(): t_rps_worker.terminate()
+            frame_ring.close()
         t_wheels.join(timeout=3.0)
         _graceful_shutdown(port, pkt, dxl_lock)
         print("■ launcher 정상 종료")
@@ -0,0 +1,225 @@
+# ============================================================
+#Licensed to the Apache Software Foundation (ASF) under one
+#or more contributor license agreements.  See the NOTICE file
+#distributed with this work for additional information
+#regarding copyright ownership.  The ASF licenses this file
+#to you under the Apache License, Version 2.0 (the
+#"License"); you may not use this file except in compliance
+#with the License.  You may obtain a copy of the License at
+
+#    http://www.apache.org/licenses/LICENSE-2.0
+
+#Unless required by applicable law or agreed to in writing, software
+#distributed under the License is distributed on an "AS IS" BASIS,
+#WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#See the License for the specific language governing permissions and
+#limitations under the License.
+# ============================================================
+# quiz_bank.py
+# OX 퀴즈 문제 은행.
+# 백그라운드 생산자가 검증된 문제를 디스크에 쌓아 두고(재시작해도 유지), 게임은 pop()으로 즉시 꺼내 씁니다.
+# 이미 낸 문제/쌓인 문제와 글자 n-gram이 많이 겹치는 문제는 버립니다.
+# 원하면 문제 음성을 미리 만들어 두어 말하기 전에 TTS를 기다리지 않게 합니다.
+
+from __future__ import annotations
+import os
+import re
+import json
+import hashlib
+import threading
+from typing import Callable
+
+QUIZ_BANK_PATH = os.getenv("QUIZ_BANK_PATH", "quiz_bank.json")
+QUIZ_BANK_SIZE = int(os.getenv("QUIZ_BANK_SIZE", "30"))              # 이만큼 채워 둠
+QUIZ_BANK_LOW = int(os.getenv("QUIZ_BANK_LOW", "15"))                # 이보다 줄면 생산 재개
+QUIZ_BATCH = int(os.getenv("QUIZ_BATCH", "10"))                       # 한 번에 요청할 문제 수
+QUIZ_DUP_THRESHOLD = float(os.getenv("QUIZ_DUP_THRESHOLD", "0.6"))   # 3-gram 자카드 유사도가 이 이상이면 중복
+QUIZ_HISTORY = int(os.getenv("QUIZ_HISTORY", "500"))                 # 기억할 출제 이력 수
+QUIZ_AUDIO_DIR = os.getenv("QUIZ_AUDIO_DIR", "quiz_audio")
+QUIZ_PRERENDER = os.getenv("QUIZ_PRERENDER", "0") not in ("0", "false", "False")
+
+_NON_WORD = re.compile(r"[^\w]")
+
+def ngrams(text: str, n: int = 3) -> frozenset[str]:
+    """공백/문장부호를 뺀 소문자 글자 n-gram 집합. '사람은 코로 숨 쉰다'와 '사람은 코로 숨을 쉰다.'를 가깝게 봅니다."""
+    t = _NON_WORD.sub("", text.lower())
+    if len(t) < n:
+        return frozenset([t]) if t else frozenset()
+    return frozenset(t[i:i + n] for i in range(len(t) - n + 1))
+
+def similarity(a: frozenset[str], b: frozenset[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+def validate(item) -> dict | None:
+    """생성된 문제 하나를 검사해 {'question', 'answer'(+explanation)} 형태로 돌려줍니다. 쓸 수 없으면 None."""
+    if not isinstance(item, dict):
+        return None
+    question = str(item.get("question") or "").strip()
+    answer = str(item.get("answer") or "").strip().upper()
+    if answer not in ("O", "X") or not (5 <= len(question) <= 120):
+        return None
+    quiz = {"question": question, "answer": answer}
+    if item.get("explanation"):
+        quiz["explanation"] = str(item["explanation"]).strip()
+    return quiz
+
+class QuizBank:
+    """
+    generate(n, avoid)는 문제 dict 목록을 돌려주는 함수입니다. (avoid: 최근/보유 문제 — 프롬프트에 넣어 겹치지 않게)
+    render_audio(text)를 주고 QUIZ_PRERENDER=1이면 문제 음성(wav 바이트)을 미리 만들어 quiz['audio']에 경로를 넣습니다.
+    """
+    def __init__(self, generate: Callable[[int, list[str]], list], render_audio: Callable[[str], bytes | None] | None = None,
+                 path: str = QUIZ_BANK_PATH, target: int = QUIZ_BANK_SIZE, low: int = QUIZ_BANK_LOW):
+        self.generate = generate
+        self.render_audio = render_audio if QUIZ_PRERENDER else None
+        self.path = path
+        self.target = target
+        self.low = low
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.pool: list[dict] = []
+        self.asked: list[str] = []
+        self._load()
+        self._grams = {q["question"]: ngrams(q["question"]) for q in self.pool}
+        self._asked_grams = [ngrams(q) for q in self.asked]
+        self._prune_audio()
+        print(f"✅ 퀴즈 은행: 보유 {len(self.pool)}문제, 출제 이력 {len(self.asked)}개 ({self.path})")
+
+    # ---- 저장/불러오기 ----
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            for item in data.get("pool", []):
+                quiz = validate(item)
+                if quiz is None:
+                    continue
+                if item.get("audio"):
+                    quiz["audio"] = item["audio"]
+                self.pool.append(quiz)
+            self.asked = [str(q) for q in data.get("asked", [])][-QUIZ_HISTORY:]
+        except FileNotFoundError:
+            pass
+        except (ValueError, OSError, AttributeError) as e:
+            print(f"⚠️ 퀴즈 은행 파일을 읽지 못했습니다 ({e}). 새로 채웁니다.")
+
+    def _save(self):
+        """임시 파일에 쓰고 바꿔치기해서, 저장 도중 꺼져도 파일이 깨지지 않게 합니다. (lock 안에서 호출)"""
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"pool": self.pool, "asked": self.asked}, f, ensure_ascii=False, indent=1)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"⚠️ 퀴즈 은행 저장 실패: {e}")
+
+    def _prune_audio(self):
+        """보유 문제가 쓰지 않는 미리 만든 음성 파일을 지웁니다. (시작할 때 한 번)"""
+        if not os.path.isdir(QUIZ_AUDIO_DIR):
+            return
+        keep = {os.path.basename(q["audio"]) for q in self.pool if q.get("audio")}
+        for name in os.listdir(QUIZ_AUDIO_DIR):
+            if name not in keep:
+                try: os.remove(os.path.join(QUIZ_AUDIO_DIR, name))
+                except OSError: pass
+
+    # ---- 중복 검사 ----
+    def _is_duplicate(self, grams: frozenset[str]) -> tuple[bool, float]:
+        best = max((similarity(grams, g) for g in list(self._grams.values()) + self._asked_grams), default=0.0)
+        return best >= QUIZ_DUP_THRESHOLD, best
+
+    def add(self, items: list) -> int:
+        """검증·중복 검사를 통과한 문제만 추가하고 추가된 수를 돌려줍니다."""
+        added = 0
+        for item in items:
+            quiz = validate(item)
+            if quiz is None:
+                continue
+            grams = ngrams(quiz["question"])
+            with self._lock:
+                dup, score = self._is_duplicate(grams)
+                if dup:
+                    print(f"  - ♻️ 중복 문제 버림 ({score:.2f}): {quiz['question']}")
+                    continue
+            if self.render_audio:
+                quiz["audio"] = self._render(quiz["question"])
+            with self._lock:
+                self.pool.append(quiz)
+                self._grams[quiz["question"]] = grams
+                added += 1
+        if added:
+            with self._lock:
+                self._save()
+        return added
+
+    def _render(self, text: str) -> str | None:
+        try:
+            data = self.render_audio(text)
+        except Exception as e:
+            print(f"  - ⚠️ 문제 음성 생성 실패: {e}")
+            return None
+        if not data:
+            return None
+        os.makedirs(QUIZ_AUDIO_DIR, exist_ok=True)
+        path = os.path.join(QUIZ_AUDIO_DIR, hashlib.sha1(text.encode("utf-8")).hexdigest()[:16] + ".wav")
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    # ---- 게임 쪽 ----
+    def pop(self) -> dict | None:
+        """다음 문제를 즉시 꺼냅니다. 비어 있으면 None. 꺼낸 문제는 출제 이력에 남아 다시 나오지 않습니다."""
+        with self._lock:
+            if not self.pool:
+                self._wake.set()
+                return None
+            quiz = self.pool.pop(0)
+            self._grams.pop(quiz["question"], None)
+            self.asked = (self.asked + [quiz["question"]])[-QUIZ_HISTORY:]
+            self._asked_grams = (self._asked_grams + [ngrams(quiz["question"])])[-QUIZ_HISTORY:]
+            self._save()
+            remaining = len(self.pool)
+        if remaining < self.low:
+            self._wake.set()
+        if quiz.get("audio") and not os.path.exists(quiz["audio"]):
+            quiz.pop("audio")
+        return quiz
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self.pool)
+
+    # ---- 생산자 ----
+    def start(self):
+        self._thread = threading.Thread(target=self._producer, name="quiz-bank", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def _producer(self):
+        self._wake.set()  # 시작하자마자 한 번 채움
+        failures = 0
+        while not self._stop.is_set():
+            self._wake.wait(timeout=600.0)
+            self._wake.clear()
+            while not self._stop.is_set() and len(self) < self.target:
+                with self._lock:
+                    avoid = [q["question"] for q in self.pool] + self.asked[-20:]
+                try:
+                    items = self.generate(min(QUIZ_BATCH, self.target - len(self)), avoid)
+                    added = self.add(items if isinstance(items, list) else [])
+                    print(f"  - ✅ (퀴즈 은행) {added}문제 추가, 보유 {len(self)}/{self.target}")
+                    failures = failures + 1 if added == 0 else 0
+                except Exception as e:
+                    print(f"  - ❌ (퀴즈 은행) 문제 생성 실패: {e}")
+                    failures += 1
+                if failures:
+                    # 실패나 중복만 계속 나오면 점점 길게 쉬었다가 다시 시도합니다.
+                    if self._stop.wait(timeout=min(300.0, 10.0 * 2 ** min(failures, 5))):
+                        break
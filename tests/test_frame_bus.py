@@ -0,0 +1,24 @@
+import time
+
+import numpy as np
+
+from function.frame_bus import FrameBus
+
+def test_wait_next_returns_new_frames_once():
+    bus = FrameBus()
+    with bus.subscribe() as sub:
+        bus.publish(np.zeros((2, 2, 3), np.uint8), 1.0)
+        item = sub.wait_next(timeout=0.1)
+        assert item.timestamp == 1.0 and not item.data.flags.writeable
+        assert sub.wait_next(timeout=0.01) is None
+        assert not sub.closed
+
+def test_closed_bus_reports_closed_instead_of_blocking():
+    bus = FrameBus()
+    with bus.subscribe() as sub:
+        bus.close()
+        t0 = time.perf_counter()
+        assert sub.wait_next(timeout=1.0) is None
+        assert time.perf_counter() - t0 < 0.5
+        # 소비자 루프는 None을 받으면 closed를 보고 빠져나갑니다.
+        assert sub.closed
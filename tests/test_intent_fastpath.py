@@ -0,0 +1,31 @@
+import pytest
+
+from intent_fastpath import rule_intent
+
+@pytest.mark.parametrize("text, expected", [
+    # 명령형이면 바로 판정
+    ("춤 춰줘", "dance"),
+    ("춤 춰", "dance"),
+    ("춤 보여줘요", "dance"),
+    ("그만", "stop"),
+    ("그만해", "stop"),
+    ("이제 멈춰!", "stop"),
+    ("가위바위보 하자", "game"),
+    ("가위바위보", "game"),
+    ("OX 퀴즈 하자", "ox_quiz"),
+    ("농담 해줘", "joke"),
+    ("개그 하나 해봐", "joke"),
+    # 거절/부정/의견/서술은 LLM에 넘김
+    ("춤 추지 마", None),
+    ("춤 안 출래", None),
+    ("춤 못 춰", None),
+    ("춤은 별로야", None),
+    ("오늘 춤 봤어", None),
+    ("춤 잘 춰?", None),
+    ("농담이야", None),
+    ("그만 웃겨", None),
+    ("가위바위보 졌어", None),
+    ("오늘 날씨 어때", None),
+])
+def test_rule_intent(text, expected):
+    assert rule_intent(text) == expected
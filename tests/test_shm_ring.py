@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from function.shm_ring import SharedFrameRing, RingSubscription
+
+@pytest.fixture
+def ring():
+    r = SharedFrameRing.create(n_slots=2, slot_bytes=4 * 4 * 3)
+    yield r
+    r.close()
+
+def frame(value):
+    return np.full((4, 4, 3), value, dtype=np.uint8)
+
+def test_wait_next_returns_copy_that_survives_slot_reuse(ring):
+    sub = RingSubscription(ring, 0)
+    ring.write(frame(1), 1.0)
+    item = sub.wait_next(timeout=0.1)
+    assert item.seq == 1 and item.timestamp == 1.0
+    # 링이 한 바퀴 돌아 같은 슬롯을 덮어써도 받은 프레임은 그대로입니다.
+    ring.write(frame(2), 2.0)
+    ring.write(frame(3), 3.0)
+    assert (item.data == 1).all()
+    assert not item.data.flags.writeable
+    sub.close()
+
+def test_wait_next_rereads_torn_slot(ring, monkeypatch):
+    sub = RingSubscription(ring, 0)
+    ring.write(frame(1), 1.0)
+    calls = []
+    real = ring.still_valid
+
+    def torn_once(token):
+        calls.append(token)
+        if len(calls) == 1:
+            ring.write(frame(2), 2.0)  # 복사하는 사이 새 프레임이 들어옴
+            return False
+        return real(token)
+
+    monkeypatch.setattr(ring, "still_valid", torn_once)
+    item = sub.wait_next(timeout=0.1)
+    assert item.seq == 2 and (item.data == 2).all()
+    sub.close()
+
+def test_wait_next_times_out_without_new_frame(ring):
+    sub = RingSubscription(ring, 0)
+    assert sub.wait_next(timeout=0.01) is None
+    sub.close()